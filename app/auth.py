@@ -2,17 +2,20 @@ from passlib.context import CryptContext
 from datetime import datetime, timedelta
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
+from jose import JWTError, ExpiredSignatureError
 from app.database import database
 from app.models import users
+from app.tokens import token_engine
+import logging
 
 
 
 
 
 
-SECRET_KEY = "7a2bb4bfe69c4659833b87fd2a174c52a19a63a0dc34d795ad52b0e9e2c02858"
-ALGORITHM = "HS256"
+logger = logging.getLogger(__name__)
+
+# Signing keys live in the token engine (app/tokens.py)
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -27,23 +30,17 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta if expires_delta else timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
+    return token_engine.encode(to_encode)
 
-def decode_access_token(token: str):
+def decode_token_payload(token: str):
     try:
-        print("Decoding token:", token)  # Debugging line
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        print("Decoded payload:", payload)
-        username: str = payload.get("sub")
-        if username is None:
-            return None
-        return username
-    except jwt.ExpiredSignatureError:
-        print("Token has expired")
+        payload = token_engine.decode(token)
+        # Never log the token itself; DEBUG records are sampled
+        logger.debug("Token decoded", extra={"sub": payload.get("sub")})
+        return payload
+    except ExpiredSignatureError:
+        logger.debug("Token has expired")
         return None
-    except jwt.JWTError as e:
-        print("Token decoding failed:", str(e))
+    except JWTError as e:
+        logger.info("Token decoding failed: %s", e)
         return None
-
-
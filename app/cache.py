@@ -0,0 +1,102 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Set
+
+# Authenticated user cache settings from environment variables
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "60"))
+# How long a worker trusts its last look at a session. A logout handled by
+# another worker is seen here within this many seconds; 0 checks every time.
+SESSION_CHECK_TTL = float(os.getenv("SESSION_CHECK_TTL", "5"))
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries also expire after a TTL."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        value, expires_at = entry
+        if expires_at <= time.time():
+            self._evict(key)
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, expires_at: Optional[float] = None):
+        deadline = time.time() + self.ttl
+        if expires_at is not None:
+            deadline = min(deadline, expires_at)
+        if key in self._data:
+            self._data.move_to_end(key)
+        self._data[key] = (value, deadline)
+        while len(self._data) > self.maxsize:
+            oldest = next(iter(self._data))
+            self._evict(oldest)
+
+    def delete(self, key: Hashable):
+        if key in self._data:
+            self._evict(key)
+
+    def clear(self):
+        self._data.clear()
+
+    def _evict(self, key: Hashable):
+        del self._data[key]
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
+
+    def __len__(self):
+        return len(self._data)
+
+
+class UserCache(TTLCache):
+    """Caches the user row for a verified token, bounded by the token's `exp`.
+
+    Keeps a reverse index from username to tokens so every cached token of a
+    user can be dropped when that user is changed or deleted.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        super().__init__(maxsize, ttl)
+        self._tokens_by_user: Dict[str, Set[Hashable]] = {}
+
+    def set(self, key: Hashable, value: Any, expires_at: Optional[float] = None):
+        if key in self._data:
+            self._evict(key)
+        self._tokens_by_user.setdefault(value["username"], set()).add(key)
+        super().set(key, value, expires_at)
+
+    def _evict(self, key: Hashable):
+        value, _ = self._data.pop(key)
+        tokens = self._tokens_by_user.get(value["username"])
+        if tokens is not None:
+            tokens.discard(key)
+            if not tokens:
+                del self._tokens_by_user[value["username"]]
+
+    def invalidate_user(self, username: str):
+        for key in list(self._tokens_by_user.get(username, ())):
+            self._evict(key)
+
+    def clear(self):
+        super().clear()
+        self._tokens_by_user.clear()
+
+
+user_cache = UserCache(AUTH_CACHE_SIZE, AUTH_CACHE_TTL)
+# Whether each token id (`jti`) is still active, per worker
+session_cache = TTLCache(AUTH_CACHE_SIZE, SESSION_CHECK_TTL)
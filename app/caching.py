@@ -0,0 +1,52 @@
+from starlette.datastructures import MutableHeaders
+
+# Cache-Control per route template for GET and HEAD. Task data is private
+# to its user and always revalidated, which the ETags make cheap; anything
+# that carries credentials is never stored.
+CACHE_POLICIES = {
+    "/": ("public, max-age=3600", None),
+    "/signup": ("no-store", None),
+    "/login": ("no-store", None),
+    "/logout": ("no-store", None),
+    "/metrics": ("no-store", None),
+    "/health/db": ("no-store", None),
+    "/tasks/": ("private, no-cache", "Authorization"),
+    "/tasks/{task_id}": ("private, no-cache", "Authorization"),
+    "/tasks/stats": ("private, no-cache", "Authorization"),
+    "/tasks/changes": ("private, no-cache", "Authorization"),
+}
+# Responses to writes are never stored, whatever the route
+WRITE_POLICY = ("no-store", None)
+
+
+class CacheControlMiddleware:
+    """Adds the route's Cache-Control and Vary unless the response set its own."""
+
+    def __init__(self, app, policies: dict = None):
+        self.app = app
+        self.policies = CACHE_POLICIES if policies is None else policies
+
+    def policy(self, scope):
+        if scope["method"] not in ("GET", "HEAD"):
+            return WRITE_POLICY
+        route = scope.get("route")
+        return self.policies.get(getattr(route, "path", None))
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                policy = self.policy(scope)
+                if policy is not None:
+                    cache_control, vary = policy
+                    headers = MutableHeaders(scope=message)
+                    if "cache-control" not in headers:
+                        headers["Cache-Control"] = cache_control
+                    if vary:
+                        headers.add_vary_header(vary)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,96 @@
+from typing import Iterable, Optional
+from sqlalchemy import and_, func, select
+from app.database import database, is_postgres, read_router
+from app.events import event_bus
+from app.models import tasks1, task_changes, task_versions
+from app.versions import bump_version, set_last_seq
+
+UPSERT = "upsert"
+DELETE = "delete"
+
+
+class ChangesExpired(Exception):
+    """The requested cursor points before the oldest change still retained."""
+
+
+async def record_changes(db, user_id: int, upserted: Iterable[int] = (), deleted: Iterable[int] = ()) -> Optional[int]:
+    """Append change entries and return the last seq; run inside the
+    transaction of the task write."""
+    entries = [{"user_id": user_id, "task_id": task_id, "op": UPSERT} for task_id in upserted]
+    entries += [{"user_id": user_id, "task_id": task_id, "op": DELETE} for task_id in deleted]
+    if not entries:
+        return None
+    rows = await db.fetch_all(task_changes.insert().values(entries).returning(task_changes.c.seq))
+    return max(row["seq"] for row in rows)
+
+
+async def tasks_changed(user_id: int, upserted: Iterable[int] = (), deleted: Iterable[int] = (), db=database):
+    """Call inside the transaction of every task write: logs the change for
+    delta sync, advances the user's task version so cached ETags stop
+    matching, notifies live subscribers and pins the user's reads to the
+    primary."""
+    # Bumping the version first takes the user's task_versions row lock, so
+    # the user's change seqs are handed out in commit order and a client
+    # at seq N never misses a later-committing write with a lower seq
+    await bump_version(db, user_id)
+    seq = await record_changes(db, user_id, upserted, deleted)
+    if seq is not None:
+        await set_last_seq(db, user_id, seq)
+    await event_bus.publish(db, user_id, upserted, deleted)
+    read_router.mark_write(user_id)
+
+
+async def raise_pruned_seq(db, user_id: int, seq: int):
+    """Record that the user's changes up to `seq` have been pruned; run in
+    the transaction that deletes them."""
+    greatest = func.greatest if is_postgres(db) else func.max
+    query = task_versions.update().where(task_versions.c.user_id == user_id).values(
+        pruned_seq=greatest(task_versions.c.pruned_seq, seq)
+    )
+    await db.execute(query)
+
+
+async def fetch_changes(db, user_id: int, since: int, limit: int):
+    """Return `(changes, next_seq, has_more)` for the user's writes after `since`.
+
+    Several writes to one task collapse into its latest state: tasks that
+    still exist come back as upserts with their current row, the rest as
+    deletions.
+    """
+    state = await db.fetch_one(
+        select(task_versions.c.last_seq, task_versions.c.pruned_seq).where(task_versions.c.user_id == user_id)
+    )
+    last_seq, pruned_seq = (state["last_seq"], state["pruned_seq"]) if state is not None else (0, 0)
+    # Only a cursor older than one of the user's own pruned entries has missed anything
+    if since < pruned_seq:
+        raise ChangesExpired()
+    if last_seq <= since:
+        return [], since, False
+
+    query = select(task_changes.c.seq, task_changes.c.task_id).where(
+        and_(task_changes.c.user_id == user_id, task_changes.c.seq > since)
+    ).order_by(task_changes.c.seq.asc()).limit(limit + 1)
+    entries = await db.fetch_all(query)
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    if not entries:
+        return [], since, False
+
+    # Latest position of each task in this batch, in log order
+    latest = {}
+    for entry in entries:
+        latest.pop(entry["task_id"], None)
+        latest[entry["task_id"]] = entry["seq"]
+
+    rows = await db.fetch_all(tasks1.select().where(
+        and_(tasks1.c.user_id == user_id, tasks1.c.id.in_(list(latest)))
+    ))
+    current = {row["id"]: row for row in rows}
+    changes = []
+    for task_id in latest:
+        row = current.get(task_id)
+        if row is None:
+            changes.append({"op": DELETE, "id": task_id})
+        else:
+            changes.append({"op": UPSERT, "id": task_id, "task": row})
+    return changes, entries[-1]["seq"], has_more
@@ -1,8 +1,19 @@
 from sqlalchemy import create_engine, MetaData
 from databases import Database
+from databases.core import Connection
 from sqlalchemy.orm import sessionmaker, declarative_base
 from dotenv import load_dotenv
+from bisect import bisect_left
+from typing import Dict, List, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import cookie_parser
+import asyncio
+import math
 import os
+import time
+from app.metrics import observe_db_query
 
 # Load environment variables from .env file
 load_dotenv()
@@ -14,14 +25,424 @@ DB_HOST = os.getenv("DB_HOST", "localhost")
 DB_PORT = os.getenv("DB_PORT", "5432")
 DB_NAME = os.getenv("DB_NAME", "postgres")
 
-# Construct the database URL
-DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+# Construct the database URL (DATABASE_URL overrides the individual settings)
+DATABASE_URL = os.getenv("DATABASE_URL") or f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+
+# Connection pool settings, sized per uvicorn worker
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+DB_ACQUIRE_TIMEOUT = float(os.getenv("DB_ACQUIRE_TIMEOUT", "10"))
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+DB_MAX_CONN_LIFETIME = float(os.getenv("DB_MAX_CONN_LIFETIME", "1800"))
+DB_MAX_CONN_QUERIES = int(os.getenv("DB_MAX_CONN_QUERIES", "50000"))
+# Streamed responses hold a connection until the client has read every row
+DB_MAX_STREAMS = int(os.getenv("DB_MAX_STREAMS", str(max(1, DB_POOL_MAX_SIZE // 2))))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+# Read replicas: comma separated URLs, empty means every read goes to the primary
+DB_REPLICA_URLS = [url.strip() for url in os.getenv("DB_REPLICA_URLS", "").split(",") if url.strip()]
+DB_REPLICA_STRATEGY = os.getenv("DB_REPLICA_STRATEGY", "round_robin")
+DB_READ_YOUR_WRITES_SECONDS = float(os.getenv("DB_READ_YOUR_WRITES_SECONDS", "5"))
+DB_REPLICA_RETRY_SECONDS = float(os.getenv("DB_REPLICA_RETRY_SECONDS", "30"))
+
+# Acquire latency histogram bucket upper bounds, in seconds
+ACQUIRE_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, float("inf"))
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection slot frees up within the acquire timeout."""
+
+
+class PoolStats:
+    def __init__(self, buckets=ACQUIRE_BUCKETS):
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.in_use = 0
+        self.waiters = 0
+        self.acquired = 0
+        self.timeouts = 0
+        self.acquire_seconds_total = 0.0
+
+    def observe_acquire(self, seconds: float):
+        self.acquired += 1
+        self.acquire_seconds_total += seconds
+        self.bucket_counts[bisect_left(self.buckets, seconds)] += 1
+
+    def snapshot(self) -> dict:
+        cumulative, histogram = 0, {}
+        for bound, count in zip(self.buckets, self.bucket_counts):
+            cumulative += count
+            histogram["+Inf" if bound == float("inf") else str(bound)] = cumulative
+        return {
+            "in_use": self.in_use,
+            "waiters": self.waiters,
+            "acquired": self.acquired,
+            "timeouts": self.timeouts,
+            "acquire_seconds_total": self.acquire_seconds_total,
+            "acquire_seconds_histogram": histogram,
+        }
+
+
+@contextmanager
+def _timed(operation: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_db_query(operation, time.perf_counter() - started)
+
+
+class MonitoredConnection(Connection):
+    """A task's connection that holds one of its database's slots while checked out.
+
+    The slot is taken when the task first enters the connection and freed
+    when it last leaves, so a transaction or a streamed query keeps one
+    slot for its whole duration, exactly as it keeps one pool connection.
+    """
+
+    async def __aenter__(self):
+        if self._connection_counter:
+            return await super().__aenter__()
+        db = self._database
+        started = time.perf_counter()
+        db.stats.waiters += 1
+        try:
+            await asyncio.wait_for(db._slots.acquire(), db.acquire_timeout)
+        except asyncio.TimeoutError:
+            db.stats.timeouts += 1
+            raise PoolTimeout(f"No database connection available within {db.acquire_timeout}s")
+        finally:
+            db.stats.waiters -= 1
+        try:
+            # The slots keep checkouts within the pool size, so this only waits
+            # while the pool opens a connection; that is bounded as well
+            await asyncio.wait_for(super().__aenter__(), db.acquire_timeout)
+        except asyncio.TimeoutError:
+            db._slots.release()
+            db.stats.timeouts += 1
+            raise PoolTimeout(f"No database connection available within {db.acquire_timeout}s")
+        except BaseException:
+            db._slots.release()
+            raise
+        db.stats.observe_acquire(time.perf_counter() - started)
+        db.stats.in_use += 1
+        return self
+
+    async def __aexit__(self, *exc_info):
+        try:
+            await super().__aexit__(*exc_info)
+        finally:
+            if self._connection_counter == 0:
+                self._database.stats.in_use -= 1
+                self._database._slots.release()
+
+    async def fetch_all(self, query, values=None):
+        with _timed("fetch_all"):
+            return await super().fetch_all(query, values)
+
+    async def fetch_one(self, query, values=None):
+        with _timed("fetch_one"):
+            return await super().fetch_one(query, values)
+
+    async def fetch_val(self, query, values=None, column=0):
+        with _timed("fetch_val"):
+            return await super().fetch_val(query, values, column)
+
+    async def execute(self, query, values=None):
+        with _timed("execute"):
+            return await super().execute(query, values)
+
+    async def execute_many(self, query, values):
+        with _timed("execute_many"):
+            return await super().execute_many(query, values)
+
+    async def iterate(self, query, values=None):
+        with _timed("iterate"):
+            async for record in super().iterate(query, values):
+                yield record
+
+
+class MonitoredDatabase(Database):
+    """`databases.Database` that bounds checked-out connections and records pool stats.
+
+    Each task's connection first takes one of `max_size` slots, waiting at
+    most `acquire_timeout` seconds, so pool exhaustion surfaces as a fast
+    `PoolTimeout` instead of a request that hangs until the client gives up.
+    A streamed query holds its slot until the client has read every row, so
+    at most `max_streams` streams run at once and the rest of the pool stays
+    free for ordinary requests.
+    """
+
+    def __init__(self, url, max_size: int = DB_POOL_MAX_SIZE, acquire_timeout: float = DB_ACQUIRE_TIMEOUT,
+                 max_streams: int = DB_MAX_STREAMS, **options):
+        if str(url).startswith("postgres"):
+            options["max_size"] = max_size
+        super().__init__(url, **options)
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.stats = PoolStats()
+        self._slots = asyncio.Semaphore(max_size)
+        self._streams = asyncio.Semaphore(max(1, min(max_streams, max_size)))
+
+    def connection(self) -> Connection:
+        if self._global_connection is not None:
+            return self._global_connection
+        if not self._connection:
+            self._connection = MonitoredConnection(self, self._backend)
+        return self._connection
+
+    async def reserve_stream(self):
+        """Take a stream slot, waiting at most `acquire_timeout`; returns its release function.
+
+        Reserve before the response starts, so a full house is still a 503.
+        """
+        try:
+            await asyncio.wait_for(self._streams.acquire(), self.acquire_timeout)
+        except asyncio.TimeoutError:
+            raise PoolTimeout(f"No stream slot available within {self.acquire_timeout}s")
+        released = False
+
+        def release():
+            nonlocal released
+            if not released:
+                released = True
+                self._streams.release()
+
+        return release
+
+    def pool_stats(self) -> dict:
+        stats = self.stats.snapshot()
+        stats["max_size"] = self.max_size
+        pool = getattr(self._backend, "_pool", None)
+        if pool is not None and hasattr(pool, "get_size"):
+            stats["size"] = pool.get_size()
+            stats["idle"] = pool.get_idle_size()
+        return stats
+
+
+def pool_options(url: str) -> dict:
+    # asyncpg pool settings (max_size is set by MonitoredDatabase); other backends take none
+    if not url.startswith("postgres"):
+        return {}
+    options = {
+        "min_size": DB_POOL_MIN_SIZE,
+        "max_inactive_connection_lifetime": DB_MAX_CONN_LIFETIME,
+        "max_queries": DB_MAX_CONN_QUERIES,
+    }
+    if DB_STATEMENT_TIMEOUT_MS:
+        options["server_settings"] = {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}
+    return options
+
+
+# Errors that mean a replica is unreachable rather than that the query is wrong
+REPLICA_ERRORS = (OSError, asyncio.TimeoutError, PoolTimeout)
+try:
+    import asyncpg
+    REPLICA_ERRORS += (asyncpg.PostgresConnectionError, asyncpg.InterfaceError, asyncpg.CannotConnectNowError)
+except ImportError:
+    pass
+
+
+# The current request's view of the client's writes: when the client last
+# wrote (from its cookie) and whether this request wrote
+_request_writes: ContextVar[Optional[dict]] = ContextVar("request_writes", default=None)
+LAST_WRITE_COOKIE = "last_write"
+
+
+class ReplicaRouter:
+    """Sends read-only queries to replicas and everything else to the primary.
+
+    A user's reads stay on the primary for `sticky_seconds` after they write,
+    so they always see their own changes despite replication lag. Within one
+    worker this is tracked per user; across workers it relies on the client
+    sending back the `last_write` cookie set by ReadYourWritesMiddleware, so
+    a client that drops cookies can read its own write stale from another
+    worker until the replica catches up. A replica that fails with a
+    connection error is skipped for `retry_seconds`, then reconnected in the
+    background.
+    """
+
+    def __init__(self, primary: MonitoredDatabase, replicas: List[MonitoredDatabase],
+                 strategy: str = "round_robin", sticky_seconds: float = 5.0, retry_seconds: float = 30.0):
+        if strategy not in ("round_robin", "least_loaded"):
+            raise ValueError(f"Unknown replica strategy: {strategy}")
+        self.primary = primary
+        self.replicas = replicas
+        self.strategy = strategy
+        self.sticky_seconds = sticky_seconds
+        self.retry_seconds = retry_seconds
+        self._next = 0
+        self._last_write: Dict[int, float] = {}
+        self._down_until: Dict[int, float] = {}
+        self._reconnecting = set()
+
+    async def connect(self):
+        for replica in self.replicas:
+            await self._connect(replica)
+
+    async def _connect(self, replica: MonitoredDatabase):
+        try:
+            await replica.connect()
+        except REPLICA_ERRORS:
+            self.mark_down(replica)
+            return
+        self._down_until.pop(id(replica), None)
+
+    async def disconnect(self):
+        for task in list(self._reconnecting):
+            task.cancel()
+        for replica in self.replicas:
+            if replica.is_connected:
+                await replica.disconnect()
+
+    def mark_write(self, user_id: int):
+        now = time.monotonic()
+        self._last_write[user_id] = now
+        if len(self._last_write) > 10000:
+            cutoff = now - self.sticky_seconds
+            self._last_write = {uid: at for uid, at in self._last_write.items() if at > cutoff}
+        marker = _request_writes.get()
+        if marker is not None:
+            marker["wrote_at"] = time.time()
+
+    def mark_down(self, replica: MonitoredDatabase):
+        self._down_until[id(replica)] = time.monotonic() + self.retry_seconds
+
+    def _recently_wrote(self, user_id: Optional[int]) -> bool:
+        if user_id is not None and time.monotonic() - self._last_write.get(user_id, float("-inf")) < self.sticky_seconds:
+            return True
+        marker = _request_writes.get()
+        client_wrote_at = marker["client_wrote_at"] if marker is not None else None
+        # Wall-clock time, as the cookie may come from another worker
+        return client_wrote_at is not None and abs(time.time() - client_wrote_at) < self.sticky_seconds
+
+    def _healthy(self) -> List[MonitoredDatabase]:
+        now = time.monotonic()
+        healthy = []
+        for replica in self.replicas:
+            if self._down_until.get(id(replica), 0) > now:
+                continue
+            if replica.is_connected:
+                healthy.append(replica)
+            else:
+                # Its retry window has passed: reconnect without holding up this read
+                self.mark_down(replica)
+                task = asyncio.get_running_loop().create_task(self._connect(replica))
+                self._reconnecting.add(task)
+                task.add_done_callback(self._reconnecting.discard)
+        return healthy
+
+    def for_read(self, user_id: Optional[int] = None) -> MonitoredDatabase:
+        if not self.replicas or self._recently_wrote(user_id):
+            return self.primary
+        healthy = self._healthy()
+        if not healthy:
+            return self.primary
+        if self.strategy == "least_loaded":
+            return min(healthy, key=lambda replica: replica.stats.in_use + replica.stats.waiters)
+        self._next = (self._next + 1) % len(healthy)
+        return healthy[self._next]
+
+    async def read(self, fn, user_id: Optional[int] = None):
+        """Run `await fn(db)` on one read database, retrying on the primary.
+
+        Several queries made inside `fn` all hit the same database, so they
+        see one consistent replication position.
+        """
+        db = self.for_read(user_id)
+        try:
+            return await fn(db)
+        except REPLICA_ERRORS:
+            if db is self.primary:
+                raise
+            self.mark_down(db)
+            return await fn(self.primary)
+
+
+class ReadYourWritesMiddleware:
+    """Carries the client's last write time between workers in a cookie.
+
+    Reads in a request whose cookie is younger than the router's
+    `sticky_seconds` go to the primary; responses to requests that wrote
+    set a fresh cookie. Does nothing when no replicas are configured.
+    """
+
+    def __init__(self, app, router: "ReplicaRouter" = None):
+        self.app = app
+        self.router = router
+
+    async def __call__(self, scope, receive, send):
+        router = self.router or read_router
+        if scope["type"] != "http" or not router.replicas:
+            await self.app(scope, receive, send)
+            return
+        cookies = cookie_parser(Headers(scope=scope).get("cookie", ""))
+        try:
+            client_wrote_at = float(cookies[LAST_WRITE_COOKIE])
+        except (KeyError, ValueError):
+            client_wrote_at = None
+        marker = {"client_wrote_at": client_wrote_at, "wrote_at": None}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and marker["wrote_at"] is not None:
+                MutableHeaders(scope=message).append(
+                    "set-cookie",
+                    f"{LAST_WRITE_COOKIE}={marker['wrote_at']:.3f}; Max-Age={math.ceil(router.sticky_seconds)}; "
+                    "Path=/; HttpOnly; SameSite=Lax",
+                )
+            await send(message)
+
+        token = _request_writes.set(marker)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_writes.reset(token)
+
 
 # Create the database object (async)
-database = Database(DATABASE_URL)
+database = MonitoredDatabase(DATABASE_URL, **pool_options(DATABASE_URL))
+
+
+def is_postgres(db=None) -> bool:
+    """Whether `db` (the primary by default) is Postgres; SQLite is the local stand-in."""
+    return (db if db is not None else database).url.dialect.startswith("postgres")
+
+
+# Router for read-only queries
+read_router = ReplicaRouter(
+    database,
+    [MonitoredDatabase(url, **pool_options(url)) for url in DB_REPLICA_URLS],
+    strategy=DB_REPLICA_STRATEGY,
+    sticky_seconds=DB_READ_YOUR_WRITES_SECONDS,
+    retry_seconds=DB_REPLICA_RETRY_SECONDS,
+)
+
+_engine = None
+
+
+def get_engine():
+    """Sync SQLAlchemy engine for migrations and schema checks, built on first use.
+
+    Creating it loads the sync DB driver, so importing the app stays free of
+    that cost and works without one until a migration actually runs.
+    """
+    global _engine
+    if _engine is None:
+        _engine = create_engine(
+            DATABASE_URL,
+            echo=False,  # Turn off SQL statements in console
+            pool_pre_ping=DB_POOL_PRE_PING,
+            pool_recycle=DB_MAX_CONN_LIFETIME,
+        )
+    return _engine
+
+
+def __getattr__(name):
+    # `from app.database import engine` keeps working, lazily
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# Create SQLAlchemy engine (sync, for table creation)
-engine = create_engine(DATABASE_URL, echo=True)
 
 # Metadata for table definitions
 metadata = MetaData()
@@ -29,20 +450,13 @@ metadata = MetaData()
 # Base for ORM (optional, not used in your current models)
 Base = declarative_base()
 
-# Session (for synchronous DB operations if needed)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Session (for synchronous DB operations if needed), bound to the engine on use
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
 
 # Optional helper to get DB session
 def get_db():
-    db = SessionLocal()
+    db = SessionLocal(bind=get_engine())
     try:
         yield db
     finally:
         db.close()
-
-
-engine = create_engine(
-    DATABASE_URL,
-    echo=False  # Turn off SQL statements in console
-)
-
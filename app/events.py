@@ -0,0 +1,191 @@
+import asyncio
+import json
+import logging
+import os
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, Optional, Set
+from sqlalchemy import func, select
+from app.database import DATABASE_URL, is_postgres
+
+logger = logging.getLogger(__name__)
+
+# Event bus settings from environment variables
+EVENT_BUS = os.getenv("EVENT_BUS", "auto")
+EVENT_CHANNEL = os.getenv("EVENT_CHANNEL", "task_events")
+EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", "100"))
+EVENT_KEEPALIVE_SECONDS = float(os.getenv("EVENT_KEEPALIVE_SECONDS", "25"))
+EVENT_RECONNECT_SECONDS = float(os.getenv("EVENT_RECONNECT_SECONDS", "5"))
+
+# NOTIFY payloads are capped at 8000 bytes, so large bulk writes are split
+MAX_IDS_PER_EVENT = 500
+
+
+class Subscription:
+    """One subscriber's bounded queue of events.
+
+    A subscriber that falls `EVENT_QUEUE_SIZE` events behind is marked as
+    overflowed and gets no more events; it should resync through
+    `GET /tasks/changes` instead of holding memory for a dead client.
+    """
+
+    def __init__(self, bus: "EventBus", user_id: int, maxsize: int = EVENT_QUEUE_SIZE):
+        self.bus = bus
+        self.user_id = user_id
+        self.overflowed = False
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize)
+
+    def put(self, event: dict):
+        if self.overflowed:
+            return
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[dict]:
+        """Next event, or None when `timeout` passes without one."""
+        if not self._queue.empty():
+            return self._queue.get_nowait()
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+
+class EventBus(ABC):
+    """Fans task change events out to this worker's subscribers by user id."""
+
+    def __init__(self, queue_size: int = EVENT_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+
+    @property
+    def subscriber_count(self) -> int:
+        return sum(len(subscriptions) for subscriptions in self._subscribers.values())
+
+    def subscribe(self, user_id: int) -> Subscription:
+        subscription = Subscription(self, user_id, self.queue_size)
+        self._subscribers.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscriptions = self._subscribers.get(subscription.user_id)
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscribers[subscription.user_id]
+
+    def dispatch(self, user_id: int, event: dict):
+        for subscription in list(self._subscribers.get(user_id, ())):
+            subscription.put(event)
+
+    @abstractmethod
+    async def publish(self, db, user_id: int, upserted: Iterable[int] = (), deleted: Iterable[int] = ()):
+        raise NotImplementedError
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+
+def _events(upserted: Iterable[int], deleted: Iterable[int]):
+    for op, ids in (("upsert", list(upserted)), ("delete", list(deleted))):
+        for start in range(0, len(ids), MAX_IDS_PER_EVENT):
+            yield {"op": op, "ids": ids[start:start + MAX_IDS_PER_EVENT]}
+
+
+class MemoryEventBus(EventBus):
+    """Process-local stand-in for tests and single-worker development."""
+
+    async def publish(self, db, user_id: int, upserted: Iterable[int] = (), deleted: Iterable[int] = ()):
+        for event in _events(upserted, deleted):
+            self.dispatch(user_id, event)
+
+
+class PostgresEventBus(EventBus):
+    """Publishes with NOTIFY and receives on one LISTEN connection per worker.
+
+    `publish` runs `pg_notify` through the caller's database, so inside a
+    write transaction the event is only delivered once that write commits.
+    Every worker, including the one that wrote, receives it on its listener
+    connection and fans it out to its own subscribers.
+    """
+
+    def __init__(self, url: str = DATABASE_URL, channel: str = EVENT_CHANNEL,
+                 reconnect_seconds: float = EVENT_RECONNECT_SECONDS, queue_size: int = EVENT_QUEUE_SIZE):
+        super().__init__(queue_size)
+        self.url = url
+        self.channel = channel
+        self.reconnect_seconds = reconnect_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    async def publish(self, db, user_id: int, upserted: Iterable[int] = (), deleted: Iterable[int] = ()):
+        for event in _events(upserted, deleted):
+            payload = json.dumps({"user_id": user_id, **event}, separators=(",", ":"))
+            await db.execute(select(func.pg_notify(self.channel, payload)))
+
+    def _on_notify(self, connection, pid, channel, payload):
+        try:
+            event = json.loads(payload)
+            user_id = event.pop("user_id")
+        except (ValueError, KeyError):
+            logger.warning("Ignoring malformed event on %s", channel)
+            return
+        self.dispatch(user_id, event)
+
+    async def _listen_forever(self):
+        import asyncpg
+
+        while True:
+            lost = asyncio.Event()
+            connection = None
+            try:
+                connection = await asyncpg.connect(self.url)
+                connection.add_termination_listener(lambda _: lost.set())
+                await connection.add_listener(self.channel, self._on_notify)
+                logger.info("Listening for task events on %s", self.channel)
+                await lost.wait()
+                logger.warning("Event listener connection lost, reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Event listener failed, retrying in %ss", self.reconnect_seconds)
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(self.reconnect_seconds)
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen_forever())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+def build_event_bus(backend: str = EVENT_BUS) -> EventBus:
+    if backend == "auto":
+        backend = "postgres" if is_postgres() else "memory"
+    if backend == "memory":
+        return MemoryEventBus()
+    if backend == "postgres":
+        return PostgresEventBus()
+    raise ValueError(f"Unknown event bus backend: {backend}")
+
+
+event_bus = build_event_bus()
+
+
+def sse_frame(event: dict, name: str = "tasks") -> bytes:
+    return f"event: {name}\ndata: {json.dumps(event, separators=(',', ':'))}\n\n".encode()
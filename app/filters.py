@@ -0,0 +1,134 @@
+from datetime import date, datetime, timezone
+from typing import List, Optional, Tuple
+from fastapi import HTTPException
+from sqlalchemy import and_, func, literal, or_
+from sqlalchemy.types import DateTime
+from app.database import is_postgres
+from app.models import tasks1
+from app.responses import TASK_FIELDS
+
+# Columns GET /tasks/ can sort on; "-" in front sorts descending
+SORT_KEYS = ("id", "title", "status", "due_date", "time_of_generation")
+MAX_STATUSES = 20
+
+
+def _split(value: Optional[str]) -> List[str]:
+    return [part.strip() for part in value.split(",") if part.strip()] if value else []
+
+
+def parse_fields(value: Optional[str]) -> List[str]:
+    """Requested fields in TaskOut order; all of them when none are given."""
+    fields = set(_split(value))
+    unknown = fields.difference(TASK_FIELDS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    return [field for field in TASK_FIELDS if field in fields] if fields else list(TASK_FIELDS)
+
+
+def parse_statuses(value: Optional[str]) -> List[str]:
+    statuses = sorted(set(_split(value)))
+    if len(statuses) > MAX_STATUSES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_STATUSES} statuses can be given")
+    return statuses
+
+
+def parse_sort(value: Optional[str]) -> Tuple[str, bool]:
+    """Return `(column, descending)`, defaulting to ascending id."""
+    if not value:
+        return "id", False
+    descending = value.startswith("-")
+    key = value.lstrip("-")
+    if key not in SORT_KEYS:
+        raise HTTPException(status_code=400, detail=f"Cannot sort by {key}")
+    return key, descending
+
+
+def _created_at():
+    # SQLite keeps CURRENT_TIMESTAMP as text without fractional seconds,
+    # while bound datetimes carry them; datetime() brings both to one form
+    column = tasks1.c.time_of_generation
+    return column if is_postgres() else func.datetime(column)
+
+
+def _timestamp(value: datetime):
+    if is_postgres():
+        return value
+    if value.tzinfo is not None:
+        # Stored times are UTC
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return func.datetime(literal(value, DateTime()))
+
+
+def filter_conditions(statuses: List[str], due_from: Optional[date], due_to: Optional[date],
+                      created_from: Optional[datetime], created_to: Optional[datetime]) -> list:
+    # Ranges are inclusive; status and due date are served by the
+    # (user_id, status, due_date) index, created-at by (user_id, time_of_generation)
+    conditions = []
+    if statuses:
+        conditions.append(tasks1.c.status.in_(statuses))
+    if due_from is not None:
+        conditions.append(tasks1.c.due_date >= due_from)
+    if due_to is not None:
+        conditions.append(tasks1.c.due_date <= due_to)
+    if created_from is not None:
+        conditions.append(_created_at() >= _timestamp(created_from))
+    if created_to is not None:
+        conditions.append(_created_at() <= _timestamp(created_to))
+    return conditions
+
+
+def sort_order(key: str, descending: bool) -> list:
+    # id breaks ties in the same direction, so the order is total and the
+    # per-user composite indexes can be scanned either way
+    if key == "id":
+        return [tasks1.c.id.desc() if descending else tasks1.c.id.asc()]
+    column = tasks1.c[key]
+    if descending:
+        return [column.desc().nulls_last(), tasks1.c.id.desc()]
+    return [column.asc().nulls_last(), tasks1.c.id.asc()]
+
+
+def _cursor_value(key: str, value):
+    # Dates and timestamps travel as ISO strings inside the cursor
+    if value is None:
+        return value
+    if key in ("title", "status"):
+        if not isinstance(value, str):
+            raise TypeError(f"{key} cursor value must be a string")
+        return value
+    if key == "due_date":
+        return date.fromisoformat(value)
+    return datetime.fromisoformat(value)
+
+
+def keyset_condition(key: str, descending: bool, after: dict):
+    """Rows strictly after the cursor's `(value, id)` in `sort_order`; NULLs sort last."""
+    last_id = after["id"]
+    id_after = tasks1.c.id < last_id if descending else tasks1.c.id > last_id
+    if key == "id":
+        return id_after
+    if "value" not in after:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    try:
+        value = _cursor_value(key, after["value"])
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    column = tasks1.c[key]
+    if value is None:
+        return and_(column.is_(None), id_after)
+    if key == "time_of_generation":
+        column, value = _created_at(), _timestamp(value)
+    past = column < value if descending else column > value
+    return or_(past, and_(column == value, id_after), column.is_(None))
+
+
+def sort_name(key: str, descending: bool) -> str:
+    return f"-{key}" if descending else key
+
+
+def cursor_for(row, key: str, descending: bool) -> dict:
+    cursor = {"id": row["id"], "sort": sort_name(key, descending)}
+    if key != "id":
+        value = row[key]
+        cursor["value"] = value.isoformat() if isinstance(value, (date, datetime)) else value
+    return cursor
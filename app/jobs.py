@@ -0,0 +1,126 @@
+import os
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import and_, select
+from app.changes import raise_pruned_seq, tasks_changed
+from app.database import database, is_postgres
+from app.models import tasks1, task_changes
+from app.ratelimit import DatabaseBackend, rate_limiter
+from app.scheduler import AdvisoryLockLeader, Job, LocalLeader, Scheduler, in_batches
+from app.search import unindex_task
+from app.sessions import MemorySessionStore, SESSION_PURGE_INTERVAL, session_store
+
+# Background job settings from environment variables; an interval of 0 turns a job off
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "true").lower() in ("1", "true", "yes")
+SCHEDULER_LEADER = os.getenv("SCHEDULER_LEADER", "auto")
+SCHEDULER_LEADER_RETRY_SECONDS = float(os.getenv("SCHEDULER_LEADER_RETRY_SECONDS", "15"))
+JOB_BATCH_SIZE = int(os.getenv("JOB_BATCH_SIZE", "500"))
+JOB_MAX_BATCHES = int(os.getenv("JOB_MAX_BATCHES", "100"))
+OVERDUE_INTERVAL = float(os.getenv("OVERDUE_INTERVAL", "300"))
+OVERDUE_STATUS = os.getenv("OVERDUE_STATUS", "overdue")
+LEGACY_LOGIN_PURGE_INTERVAL = float(os.getenv("LEGACY_LOGIN_PURGE_INTERVAL", "3600"))
+CHANGE_LOG_PRUNE_INTERVAL = float(os.getenv("CHANGE_LOG_PRUNE_INTERVAL", "3600"))
+CHANGE_LOG_RETENTION_DAYS = float(os.getenv("CHANGE_LOG_RETENTION_DAYS", "30"))
+RATE_LIMIT_PURGE_INTERVAL = float(os.getenv("RATE_LIMIT_PURGE_INTERVAL", "600"))
+
+# Rows the login endpoint used to insert into tasks1 before sessions existed
+LEGACY_LOGIN_TITLE = "Login Token"
+
+
+async def _changed_by_user(rows, upserted: bool):
+    by_user = defaultdict(list)
+    for row in rows:
+        by_user[row["user_id"]].append(row["id"])
+    for user_id, ids in by_user.items():
+        if upserted:
+            await tasks_changed(user_id, upserted=ids)
+        else:
+            await tasks_changed(user_id, deleted=ids)
+
+
+async def mark_overdue_batch(today=None, batch_size: int = JOB_BATCH_SIZE) -> int:
+    """Move one batch of active tasks past their due date to OVERDUE_STATUS."""
+    today = today or datetime.now(timezone.utc).date()
+    due = and_(tasks1.c.status == "active", tasks1.c.due_date < today)
+    ids = select(tasks1.c.id).where(due).order_by(tasks1.c.id).limit(batch_size)
+    async with database.transaction():
+        # The status check is repeated so a concurrent edit is not overwritten
+        query = tasks1.update().where(and_(tasks1.c.id.in_(ids), due)).values(
+            status=OVERDUE_STATUS
+        ).returning(tasks1.c.id, tasks1.c.user_id)
+        rows = await database.fetch_all(query)
+        await _changed_by_user(rows, upserted=True)
+    return len(rows)
+
+
+async def purge_legacy_login_rows_batch(batch_size: int = JOB_BATCH_SIZE) -> int:
+    legacy = and_(tasks1.c.title == LEGACY_LOGIN_TITLE, tasks1.c.token.isnot(None))
+    ids = select(tasks1.c.id).where(legacy).order_by(tasks1.c.id).limit(batch_size)
+    async with database.transaction():
+        query = tasks1.delete().where(tasks1.c.id.in_(ids)).returning(tasks1.c.id, tasks1.c.user_id)
+        rows = await database.fetch_all(query)
+        await _changed_by_user(rows, upserted=False)
+    for row in rows:
+        unindex_task(row["id"])
+    return len(rows)
+
+
+async def prune_change_log_batch(retention_days: float = CHANGE_LOG_RETENTION_DAYS,
+                                 batch_size: int = JOB_BATCH_SIZE) -> int:
+    # Clients holding a cursor older than this get 410 and resync. Entries
+    # are appended in time order, so only the oldest batch by seq is looked
+    # at, which keeps a run with nothing to prune to one short index scan.
+    cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+    oldest = select(task_changes.c.seq).order_by(task_changes.c.seq).limit(batch_size)
+    query = task_changes.delete().where(
+        and_(task_changes.c.seq.in_(oldest), task_changes.c.changed_at < cutoff)
+    ).returning(task_changes.c.seq, task_changes.c.user_id)
+    async with database.transaction():
+        rows = await database.fetch_all(query)
+        pruned = defaultdict(int)
+        for row in rows:
+            pruned[row["user_id"]] = max(pruned[row["user_id"]], row["seq"])
+        for user_id, seq in pruned.items():
+            await raise_pruned_seq(database, user_id, seq)
+    return len(rows)
+
+
+def batched(step):
+    async def run():
+        return await in_batches(step, JOB_BATCH_SIZE, JOB_MAX_BATCHES)
+    return run
+
+
+async def purge_rate_limit_buckets() -> int:
+    # A bucket idle for its longest period is full again, same as no row
+    longest = max((policy.rate.period for policy in rate_limiter.policies), default=3600)
+    return await rate_limiter.backend.purge_idle(time.time() - longest)
+
+
+def build_jobs() -> list:
+    jobs = [
+        Job("mark_overdue", OVERDUE_INTERVAL, batched(mark_overdue_batch)),
+        Job("purge_legacy_login_rows", LEGACY_LOGIN_PURGE_INTERVAL, batched(purge_legacy_login_rows_batch),
+            until_empty=True),
+        Job("purge_sessions", SESSION_PURGE_INTERVAL,
+            batched(lambda: session_store.purge_expired(JOB_BATCH_SIZE)),
+            leader_only=not isinstance(session_store, MemorySessionStore)),
+        Job("prune_change_log", CHANGE_LOG_PRUNE_INTERVAL, batched(prune_change_log_batch)),
+    ]
+    if isinstance(rate_limiter.backend, DatabaseBackend):
+        jobs.append(Job("purge_rate_limit_buckets", RATE_LIMIT_PURGE_INTERVAL, purge_rate_limit_buckets))
+    return jobs
+
+
+def build_leader(kind: str = SCHEDULER_LEADER):
+    if kind == "auto":
+        kind = "advisory_lock" if is_postgres() else "local"
+    if kind == "local":
+        return LocalLeader()
+    if kind == "advisory_lock":
+        return AdvisoryLockLeader(retry_seconds=SCHEDULER_LEADER_RETRY_SECONDS)
+    raise ValueError(f"Unknown scheduler leader: {kind}")
+
+
+scheduler = Scheduler(build_jobs() if SCHEDULER_ENABLED else [], build_leader())
@@ -1,46 +1,87 @@
-from fastapi import FastAPI, HTTPException, Depends, status, Header
+from fastapi import APIRouter, FastAPI, HTTPException, Depends, status, Header, Query, Body
 from fastapi.security import OAuth2PasswordRequestForm
 from app.models import users, tasks1
-from app.schemas import UserSignup, UserLogin, TaskCreate, TaskUpdate, TaskOut
-from app.database import database, metadata, engine
-from app.auth import get_password_hash, verify_password, create_access_token, decode_access_token
+from app.schemas import (
+    UserSignup, UserLogin, TaskCreate, TaskUpdate, TaskOut,
+    TaskBulkUpdateItem, TaskBulkDelete, BulkResult, MAX_BULK_ITEMS, TaskChanges, TaskStats,
+)
+from app.database import database, is_postgres, read_router, PoolTimeout, ReadYourWritesMiddleware
+from app.tokens import token_engine
+from app.auth import create_access_token, decode_token_payload, ACCESS_TOKEN_EXPIRE_MINUTES
+from app.cache import user_cache, session_cache
+from app.hashing import hash_password_async, verify_password_async, hashing_pool
+from app.sessions import session_store
+from app.jobs import scheduler
+from app.search import search_clause, search_index, index_task, unindex_task
+from app.metrics import MetricsMiddleware, registry
+from app.ratelimit import RateLimitMiddleware, RATE_LIMIT_ENABLED, rate_limiter
+from app.logging_config import RequestIdMiddleware, setup_logging, shutdown_logging
+from app.responses import FastJSONResponse, TASK_FIELDS, dumps, encode_tasks, task_dict
+from app.filters import (
+    SORT_KEYS, parse_fields, parse_statuses, parse_sort, filter_conditions, sort_order, sort_name,
+    keyset_condition, cursor_for,
+)
+from app.versions import (
+    get_version, make_etag, validator_headers, is_not_modified, not_modified_response,
+)
+from app.caching import CacheControlMiddleware
+from app.compression import CompressionMiddleware
+from app.stats import task_stats
+from app.changes import tasks_changed, fetch_changes, ChangesExpired
+from app.events import event_bus, sse_frame, EVENT_KEEPALIVE_SECONDS
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, encode_cursor, decode_cursor, split_page
 from sqlalchemy import select, and_, or_
 from typing import List, Optional
-from datetime import datetime
+from datetime import date, datetime, timedelta, timezone
+from uuid import uuid4
+from contextlib import asynccontextmanager
 from starlette.status import HTTP_400_BAD_REQUEST
+from starlette.background import BackgroundTask
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse, PlainTextResponse
 from fastapi import Request
 
 
 
-app = FastAPI()
-
-# Create tables if not exists (optional)
-metadata.create_all(engine)
-
-@app.on_event("startup")
-async def startup():
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Schema migrations are a separate deploy step (run.py or
+    # `python -m app.migrations`), so workers start without touching DDL
+    setup_logging()
     await database.connect()
+    await read_router.connect()
+    if not is_postgres():
+        await search_index.build()
+    await event_bus.start()
+    # Periodic maintenance runs beside the request handlers, never inside them
+    await scheduler.start()
+    try:
+        yield
+    finally:
+        await scheduler.stop()
+        await event_bus.stop()
+        await read_router.disconnect()
+        await database.disconnect()
+        hashing_pool.shutdown()
+        shutdown_logging()
+
 
-@app.on_event("shutdown")
-async def shutdown():
-    await database.disconnect()
+router = APIRouter()
 
-@app.get("/")
+@router.get("/")
 async def read_root():
     return {"message": "Welcome to the Task Management API"}
 
 
 # Signup API
-@app.post("/signup", status_code=status.HTTP_201_CREATED)
+@router.post("/signup", status_code=status.HTTP_201_CREATED)
 async def signup(user: UserSignup):
     query = users.select().where(users.c.username == user.username)
     existing_user = await database.fetch_one(query)
     if (existing_user):
         raise HTTPException(status_code=400, detail="Username already registered")
 
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await hash_password_async(user.password)
     query = users.insert().values(
         first_name=user.first_name,
         last_name=user.last_name,
@@ -48,10 +89,11 @@ async def signup(user: UserSignup):
         password=hashed_password
     )
     await database.execute(query)
+    # Drop anything cached for a previous account with this username
+    user_cache.invalidate_user(user.username)
     return {"message": "User created successfully"}
 
 
-@app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     return JSONResponse(
         status_code=HTTP_400_BAD_REQUEST,
@@ -59,142 +101,484 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
     )
 
 
+async def pool_timeout_handler(request: Request, exc: PoolTimeout):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Database is busy, please retry shortly"},
+        headers={"Retry-After": "1"}
+    )
+
+
+# Database pool health and stats
+@router.get("/health/db")
+async def database_health():
+    stats = database.pool_stats()
+    stats["replicas"] = [replica.pool_stats() for replica in read_router.replicas]
+    return stats
+
+
+def _runtime_metrics():
+    lines = [
+        "# TYPE auth_cache_hits_total counter",
+        f"auth_cache_hits_total {user_cache.hits}",
+        "# TYPE auth_cache_misses_total counter",
+        f"auth_cache_misses_total {user_cache.misses}",
+        "# TYPE jwt_verify_cache_hits_total counter",
+        f"jwt_verify_cache_hits_total {token_engine.verified.hits}",
+        "# TYPE jwt_verify_cache_misses_total counter",
+        f"jwt_verify_cache_misses_total {token_engine.verified.misses}",
+        "# TYPE password_hash_pending gauge",
+        f"password_hash_pending {hashing_pool.pending}",
+        "# TYPE rate_limited_requests_total counter",
+        f"rate_limited_requests_total {rate_limiter.limited}",
+        "# TYPE task_event_subscribers gauge",
+        f"task_event_subscribers {event_bus.subscriber_count}",
+    ]
+    pool = database.pool_stats()
+    for key in ("in_use", "waiters", "size", "idle"):
+        if key in pool:
+            lines.append(f"# TYPE db_pool_{key} gauge")
+            lines.append(f"db_pool_{key} {pool[key]}")
+    lines.append("# TYPE db_pool_acquire_timeouts_total counter")
+    lines.append(f"db_pool_acquire_timeouts_total {pool['timeouts']}")
+    return lines
+
+
+registry.register_collector(_runtime_metrics)
+
+
+# Prometheus scrape endpoint
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
 # Login API
-@app.post("/login")
+@router.post("/login")
 async def login(user: UserLogin):
     query = users.select().where(users.c.username == user.username)
     db_user = await database.fetch_one(query)
-    if not db_user or not verify_password(user.password, db_user["password"]):
+    if not db_user or not await verify_password_async(user.password, db_user["password"]):
         raise HTTPException(status_code=400, detail="Invalid username or password")
 
-    token = create_access_token({"sub": db_user["username"]})
-    # Store token in tasks table with dummy task (or you can create a separate token table if preferred)
-    # But as per your requirement, token is stored in tasks table linked with user
-    # So here we create a task with token on login (a bit unusual but per requirement)
-    query = tasks1.insert().values(
-        title="Login Token",
-        description="JWT token generated on login",
-        token=token,
-        time_of_generation=datetime.utcnow(),
-        status="active",
-        user_id=db_user["id"],
-        due_date=None
-    )
-    await database.execute(query)
+    # Each token carries a session id so it can be revoked before it expires
+    jti = uuid4().hex
+    expires_delta = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    token = create_access_token({"sub": db_user["username"], "jti": jti}, expires_delta)
+    await session_store.create(jti, db_user["id"], datetime.now(timezone.utc) + expires_delta)
+
+    return {"access_token": token, "token_type": "bearer"}
 
-    return {"access_token": token}
+async def session_active(jti: str) -> bool:
+    active = session_cache.get(jti)
+    if active is None:
+        active = await session_store.is_active(jti)
+        session_cache.set(jti, active)
+    return active
 
 # Dependency to get current user from token
 async def get_current_user(authorization: Optional[str] = Header(None)):
     if not authorization:
         raise HTTPException(status_code=401, detail="Authorization header missing")
-    username = decode_access_token(authorization)
+
+    # Verification is cached by the token engine; the session is checked on
+    # every request, from a short-lived cache, so logouts on other workers
+    # take effect within SESSION_CHECK_TTL
+    payload = decode_token_payload(authorization)
+    username = payload.get("sub") if payload else None
     if username is None:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
+    jti = payload.get("jti")
+    if not jti or not await session_active(jti):
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
 
+    # Verified tokens are cached with their user row until the token expires
+    user = user_cache.get(authorization)
+    if user is not None:
+        return user
     query = users.select().where(users.c.username == username)
     user = await database.fetch_one(query)
     if user is None:
         raise HTTPException(status_code=401, detail="User not found")
+    user_cache.set(authorization, user, payload.get("exp"))
     return user
 
+# Logout API: revoke the session behind the presented token
+@router.post("/logout")
+async def logout(authorization: Optional[str] = Header(None), current_user=Depends(get_current_user)):
+    payload = decode_token_payload(authorization)
+    if payload and payload.get("jti"):
+        await session_store.revoke(payload["jti"])
+        session_cache.set(payload["jti"], False)
+    user_cache.delete(authorization)
+    return {"detail": "Logged out"}
+
 # Create Task
-@app.post("/tasks/", response_model=TaskOut, status_code=status.HTTP_201_CREATED)
+@router.post("/tasks/", response_model=TaskOut, status_code=status.HTTP_201_CREATED)
 async def create_task(task: TaskCreate, current_user=Depends(get_current_user)):
+    # time_of_generation comes from the server default and is echoed back
     query = tasks1.insert().values(
         title=task.title,
-        
         description=task.description,
-        
-        time_of_generation=datetime.utcnow(),
         status="active",
         user_id=current_user.id,
         due_date=task.due_date
+    ).returning(*tasks1.c)
+    async with database.transaction():
+        created = await database.fetch_one(query)
+        await tasks_changed(current_user["id"], upserted=[created["id"]])
+    index_task(created)
+    return created
+# Bulk task APIs: declared before /tasks/{task_id} so "bulk" is not read as an id
+@router.post("/tasks/bulk", response_model=BulkResult, status_code=status.HTTP_201_CREATED)
+async def create_tasks_bulk(
+    tasks: List[TaskCreate] = Body(..., min_length=1, max_length=MAX_BULK_ITEMS),
+    current_user=Depends(get_current_user),
+):
+    # One multi-row INSERT; serial ids follow input order
+    query = tasks1.insert().values([
+        {
+            "title": task.title,
+            "description": task.description,
+            "status": "active",
+            "user_id": current_user["id"],
+            "due_date": task.due_date,
+        }
+        for task in tasks
+    ]).returning(*tasks1.c)
+    async with database.transaction():
+        created = sorted(await database.fetch_all(query), key=lambda row: row["id"])
+        await tasks_changed(current_user["id"], upserted=[row["id"] for row in created])
+    for row in created:
+        index_task(row)
+    return {"results": [{"id": row["id"], "status": "created", "task": row} for row in created]}
+
+
+@router.patch("/tasks/bulk", response_model=BulkResult)
+async def update_tasks_bulk(
+    tasks: List[TaskBulkUpdateItem] = Body(..., min_length=1, max_length=MAX_BULK_ITEMS),
+    current_user=Depends(get_current_user),
+):
+    results = []
+    # Ids actually written; items with no fields only read the row
+    changed = []
+    async with database.transaction():
+        for task in tasks:
+            owned = and_(tasks1.c.id == task.id, tasks1.c.user_id == current_user["id"])
+            update_data = task.dict(exclude_unset=True, exclude={"id"})
+            if update_data:
+                query = tasks1.update().where(owned).values(**update_data).returning(*tasks1.c)
+            else:
+                query = tasks1.select().where(owned)
+            row = await database.fetch_one(query)
+            if row is None:
+                results.append({"id": task.id, "status": "not_found"})
+            else:
+                results.append({"id": task.id, "status": "updated", "task": row})
+                if update_data:
+                    changed.append(task.id)
+        # Nothing written: cached ETags stay valid and reads stay on replicas
+        if changed:
+            await tasks_changed(current_user["id"], upserted=list(dict.fromkeys(changed)))
+    for result in results:
+        if result["status"] == "updated":
+            index_task(result["task"])
+    return {"results": results}
+
+
+@router.delete("/tasks/bulk", response_model=BulkResult)
+async def delete_tasks_bulk(payload: TaskBulkDelete, current_user=Depends(get_current_user)):
+    query = tasks1.delete().where(
+        and_(
+            tasks1.c.user_id == current_user["id"],
+            tasks1.c.id.in_(payload.ids)
+        )
+    ).returning(tasks1.c.id)
+    async with database.transaction():
+        deleted = {row["id"] for row in await database.fetch_all(query)}
+        if deleted:
+            await tasks_changed(current_user["id"], deleted=sorted(deleted))
+    for task_id in deleted:
+        unindex_task(task_id)
+    # A repeated id was deleted by its first occurrence
+    results, reported = [], set()
+    for task_id in payload.ids:
+        if task_id in deleted and task_id not in reported:
+            reported.add(task_id)
+            results.append({"id": task_id, "status": "deleted"})
+        else:
+            results.append({"id": task_id, "status": "not_found"})
+    return {"results": results}
+
+# Delta sync API: only the changes since the client's cursor
+@router.get("/tasks/changes", response_model=TaskChanges)
+async def get_task_changes(
+    since: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user=Depends(get_current_user),
+):
+    # Without a cursor, hand out the current head. Clients doing a full sync
+    # should take the X-Changes-Cursor header of GET /tasks/ instead, which
+    # is read from the same database as the list itself.
+    if since is None:
+        _, _, head = await read_router.read(lambda db: get_version(db, current_user["id"]), current_user["id"])
+        return FastJSONResponse({"changes": [], "cursor": encode_cursor({"seq": head}), "has_more": False})
+
+    seq = decode_cursor(since).get("seq")
+    if not isinstance(seq, int):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    try:
+        changes, next_seq, has_more = await read_router.read(
+            lambda db: fetch_changes(db, current_user["id"], seq, limit), current_user["id"]
+        )
+    except ChangesExpired:
+        raise HTTPException(status_code=410, detail="Cursor expired, full sync required")
+
+    for change in changes:
+        if "task" in change:
+            change["task"] = task_dict(change["task"])
+    return FastJSONResponse({"changes": changes, "cursor": encode_cursor({"seq": next_seq}), "has_more": has_more})
+
+# Task counts for dashboards: by status, and open tasks by due date. `today`
+# lets clients in other timezones pick the day the buckets are relative to.
+@router.get("/tasks/stats", response_model=TaskStats)
+async def get_task_stats(request: Request, today: Optional[date] = None, current_user=Depends(get_current_user)):
+    today = today or datetime.now(timezone.utc).date()
+
+    async def load(db):
+        version, last_modified, _ = await get_version(db, current_user["id"])
+        etag = make_etag(version, "stats", today.isoformat())
+        headers = validator_headers(etag, last_modified)
+        if is_not_modified(request, etag, last_modified):
+            return None, headers
+        return await task_stats(db, current_user["id"], today), headers
+
+    stats, headers = await read_router.read(load, current_user["id"])
+    if stats is None:
+        return not_modified_response(headers)
+    return FastJSONResponse(stats, headers=headers)
+
+# Live task events as Server-Sent Events. Each event names the changed ids;
+# clients apply them by following GET /tasks/changes from their cursor.
+@router.get("/tasks/events")
+async def task_events(current_user=Depends(get_current_user)):
+    subscription = event_bus.subscribe(current_user["id"])
+
+    async def frames():
+        try:
+            yield b"retry: 5000\n\n"
+            while not subscription.overflowed:
+                event = await subscription.get(EVENT_KEEPALIVE_SECONDS)
+                # A comment line keeps proxies from closing an idle stream
+                yield sse_frame(event) if event is not None else b": keep-alive\n\n"
+            yield sse_frame({}, name="resync")
+        finally:
+            subscription.close()
+
+    return StreamingResponse(
+        frames(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
-    task_id = await database.execute(query)
-    return {
-        "id": task_id,
-        "title": task.title,
-        "description": task.description,
-        "status": "active",
-        "time_of_generation": datetime.utcnow(),
-        "user_id": current_user.id,
-        "due_date": task.due_date
-    }
+
 # Get all tasks of current user
 
-@app.get("/tasks/", response_model=List[TaskOut])
-async def get_tasks(search_keyword: Optional[str] = None, current_user=Depends(get_current_user)):
-    # Base query to fetch tasks for the current user
-    query = tasks1.select().where(tasks1.c.user_id == current_user["id"])
+@router.get("/tasks/", response_model=List[TaskOut])
+async def get_tasks(
+    request: Request,
+    search_keyword: Optional[str] = None,
+    status_filter: Optional[str] = Query(None, alias="status", description="Comma separated statuses"),
+    due_from: Optional[date] = None,
+    due_to: Optional[date] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    sort: Optional[str] = Query(None, description="One of " + ", ".join(SORT_KEYS) + "; prefix with - to sort descending"),
+    fields: Optional[str] = Query(None, description="Comma separated fields to return, e.g. id,title,status"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    stream: bool = False,
+    current_user=Depends(get_current_user),
+):
+    statuses = parse_statuses(status_filter)
+    sort_key, descending = parse_sort(sort)
+    output_fields = parse_fields(fields)
+
+    # Only the requested columns are selected, plus what paging needs
+    columns = set(output_fields) | {"id", sort_key}
+    query = select(*[tasks1.c[name] for name in TASK_FIELDS if name in columns]).where(
+        tasks1.c.user_id == current_user["id"],
+        *filter_conditions(statuses, due_from, due_to, created_from, created_to)
+    )
+
+    after = decode_cursor(cursor) if cursor else None
+    if after is not None and not isinstance(after.get("id"), int):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
-    # If search_keyword is provided, filter tasks by title, description, or ID
+    rank = None
     if search_keyword:
-        query = query.where(
-            or_(
-                tasks1.c.id == search_keyword if search_keyword.isdigit() else None,
-                tasks1.c.title.ilike(f"%{search_keyword}%"),
-                tasks1.c.description.ilike(f"%{search_keyword}%")
+        # Full-text search on title and description, plus an exact id match
+        condition, rank = search_clause(search_keyword, current_user["id"])
+        if search_keyword.isdigit():
+            condition = or_(condition, tasks1.c.id == int(search_keyword))
+        query = query.where(condition)
+        # An explicit sort replaces relevance order
+        if sort is None:
+            rank = rank.label("search_rank")
+            query = query.add_columns(rank)
+        else:
+            rank = None
+
+    if rank is not None:
+        # Ranked results page on (rank, id) so ties keep a stable order
+        if after is not None:
+            if not isinstance(after.get("rank"), (int, float)):
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            query = query.where(
+                or_(
+                    rank < after["rank"],
+                    and_(rank == after["rank"], tasks1.c.id > after["id"])
+                )
             )
+        query = query.order_by(rank.desc(), tasks1.c.id.asc())
+    else:
+        # Keyset pagination: continue after the last (sort value, id) of the previous page
+        if after is not None:
+            if after.get("sort", "id") != sort_name(sort_key, descending):
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            query = query.where(keyset_condition(sort_key, descending, after))
+        query = query.order_by(*sort_order(sort_key, descending))
+
+    # Streaming mode writes one JSON document per line as rows arrive
+    if stream:
+        db = read_router.for_read(current_user["id"])
+        release = await db.reserve_stream()
+
+        async def ndjson_rows():
+            try:
+                async for row in db.iterate(query):
+                    yield dumps(task_dict(row, output_fields)) + b"\n"
+            finally:
+                release()
+
+        # The background task frees the slot if the client left before the rows started
+        return StreamingResponse(ndjson_rows(), media_type="application/x-ndjson", background=BackgroundTask(release))
+
+    # Conditional GET: the user's task version decides whether anything changed.
+    # The version is read first and from the same database as the rows.
+    async def load(db):
+        version, last_modified, last_seq = await get_version(db, current_user["id"])
+        etag = make_etag(
+            version, "list", search_keyword, statuses, due_from, due_to, created_from, created_to,
+            sort_key, descending, output_fields, limit, cursor,
         )
+        headers = validator_headers(etag, last_modified)
+        if is_not_modified(request, etag, last_modified):
+            return None, headers
+        # Read before the rows: a write landing in between shows up in both
+        # the list and the changes after this cursor, which is harmless
+        headers["X-Changes-Cursor"] = encode_cursor({"seq": last_seq})
+        return await db.fetch_all(query.limit(limit + 1)), headers
 
-    # Order tasks by ID in ascending order
-    query = query.order_by(tasks1.c.id.asc())
+    rows, headers = await read_router.read(load, current_user["id"])
+    if rows is None:
+        return not_modified_response(headers)
 
-    # Execute the query and fetch all matching tasks
-    tasks = await database.fetch_all(query)
+    tasks, has_more = split_page(rows, limit)
+    if has_more:
+        if rank is not None:
+            last = {"id": tasks[-1]["id"], "rank": tasks[-1]["search_rank"]}
+        else:
+            last = cursor_for(tasks[-1], sort_key, descending)
+        headers["X-Next-Cursor"] = encode_cursor(last)
 
-    # If no tasks are found, return an empty list
-    return tasks
+    # Rows are serialized straight to bytes, skipping TaskOut re-validation;
+    # an empty result is an empty list
+    return FastJSONResponse(encode_tasks(tasks, output_fields), headers=headers)
 
 # Get task by id
-@app.get("/tasks/{task_id}", response_model=TaskOut)
-async def get_task(task_id: int, current_user=Depends(get_current_user)):
+@router.get("/tasks/{task_id}", response_model=TaskOut)
+async def get_task(task_id: int, request: Request, current_user=Depends(get_current_user)):
     query = tasks1.select().where(
         and_(
             tasks1.c.id == task_id,
             tasks1.c.user_id == current_user["id"]
         )
     )
-    task = await database.fetch_one(query)
+
+    async def load(db):
+        version, last_modified, _ = await get_version(db, current_user["id"])
+        etag = make_etag(version, "task", task_id)
+        headers = validator_headers(etag, last_modified)
+        if is_not_modified(request, etag, last_modified):
+            return None, headers, True
+        return await db.fetch_one(query), headers, False
+
+    task, headers, not_modified = await read_router.read(load, current_user["id"])
+    if not_modified:
+        return not_modified_response(headers)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
-    return task
+    return FastJSONResponse(task_dict(task), headers=headers)
 
-# Update task
-@app.put("/tasks/{task_id}", response_model=TaskOut)
+# Update task: one ownership-scoped UPDATE ... RETURNING
+@router.put("/tasks/{task_id}", response_model=TaskOut)
 async def update_task(task_id: int, task: TaskUpdate, current_user=Depends(get_current_user)):
-    query = tasks1.select().where(
-        and_(
-            tasks1.c.id == task_id,
-            tasks1.c.user_id == current_user["id"]
-        )
+    owned = and_(
+        tasks1.c.id == task_id,
+        tasks1.c.user_id == current_user["id"]
     )
-    existing_task = await database.fetch_one(query)
-    if not existing_task:
-        raise HTTPException(status_code=404, detail="Task not found")
-
     update_data = task.dict(exclude_unset=True)
     if update_data:
-        update_query = tasks1.update().where(tasks1.c.id == task_id).values(**update_data)
-        await database.execute(update_query)
-
-    query = tasks1.select().where(tasks1.c.id == task_id)
-    updated_task = await database.fetch_one(query)
+        query = tasks1.update().where(owned).values(**update_data).returning(*tasks1.c)
+    else:
+        query = tasks1.select().where(owned)
+    async with database.transaction():
+        updated_task = await database.fetch_one(query)
+        if updated_task and update_data:
+            await tasks_changed(current_user["id"], upserted=[task_id])
+    if not updated_task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    index_task(updated_task)
     return updated_task
 
-# Delete task
-@app.delete("/tasks/{task_id}")
+# Delete task: one ownership-scoped DELETE ... RETURNING
+@router.delete("/tasks/{task_id}")
 async def delete_task(task_id: int, current_user=Depends(get_current_user)):
-    query = tasks1.select().where(
+    query = tasks1.delete().where(
         and_(
             tasks1.c.id == task_id,
             tasks1.c.user_id == current_user["id"]
         )
-    )
-    task = await database.fetch_one(query)
-    if not task:
+    ).returning(tasks1.c.id)
+    async with database.transaction():
+        deleted = await database.fetch_one(query)
+        if deleted:
+            await tasks_changed(current_user["id"], deleted=[task_id])
+    if not deleted:
         raise HTTPException(status_code=404, detail="Task not found")
-    delete_query = tasks1.delete().where(tasks1.c.id == task_id)
-    await database.execute(delete_query)
-    return {"detail": "Task deleted"}
\ No newline at end of file
+    unindex_task(task_id)
+    return {"detail": "Task deleted"}
+
+
+def create_app(rate_limit: bool = RATE_LIMIT_ENABLED) -> FastAPI:
+    """Build the application; nothing here connects to a database.
+
+    `rate_limit=False` leaves out the limiter, whose buckets are shared by
+    every app in the process; tests and in-process benchmarks use it.
+    """
+    app = FastAPI(lifespan=lifespan)
+    # Innermost first: limits apply after request ids and metrics are set up
+    if rate_limit:
+        app.add_middleware(RateLimitMiddleware)
+    app.add_middleware(ReadYourWritesMiddleware)
+    app.add_middleware(CacheControlMiddleware)
+    app.add_middleware(CompressionMiddleware)
+    app.add_middleware(MetricsMiddleware)
+    app.add_middleware(RequestIdMiddleware)
+    app.add_exception_handler(RequestValidationError, validation_exception_handler)
+    app.add_exception_handler(PoolTimeout, pool_timeout_handler)
+    app.include_router(router)
+    return app
+
+
+app = create_app()
@@ -0,0 +1,236 @@
+import logging
+from datetime import datetime, timezone
+from sqlalchemy import BigInteger, Column, Integer, MetaData, Table, TIMESTAMP, Text, inspect, select, text
+from app.database import metadata, get_engine
+from app.models import users, tasks1, sessions, task_versions, task_changes, rate_limits
+from app.search import SEARCH_BACKFILL_SQL, SEARCH_INDEX_DDL, SEARCH_INDEX_NAME, SEARCH_SCHEMA_DDL
+
+logger = logging.getLogger(__name__)
+
+# Rows per transaction when a migration backfills a large table
+BACKFILL_BATCH_SIZE = 10000
+
+# Bookkeeping lives outside the app metadata so create_all never touches it
+migration_metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    migration_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", Text, nullable=False),
+    Column("applied_at", TIMESTAMP(timezone=True), nullable=False),
+)
+
+# Global pruned mark from migration 10, replaced by per-user marks in 11
+task_changes_floor = Table(
+    "task_changes_floor",
+    migration_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("pruned_seq", BigInteger, nullable=False, default=0),
+)
+
+
+def _is_postgres(conn) -> bool:
+    return conn.dialect.name == "postgresql"
+
+
+# Migrations must be idempotent: a fresh database gets the baseline from the
+# current metadata, which may already include what later steps add.
+def _baseline(conn):
+    metadata.create_all(conn, tables=[users, tasks1])
+
+
+def _sessions_table(conn):
+    sessions.create(conn, checkfirst=True)
+    if _is_postgres(conn):
+        conn.execute(text("ALTER TABLE tasks1 ALTER COLUMN token DROP NOT NULL"))
+
+
+def outside_transaction(apply):
+    """Mark a migration to run on an autocommit connection.
+
+    Postgres cannot build an index CONCURRENTLY inside a transaction block.
+    Such steps must be idempotent on their own, since a failure part way
+    leaves what was done so far in place and the whole step is retried.
+    """
+    apply.outside_transaction = True
+    return apply
+
+
+def _create_index_concurrently(conn, name: str, ddl: str):
+    # A failed concurrent build leaves an invalid index that IF NOT EXISTS would skip
+    invalid = conn.execute(text(
+        "SELECT 1 FROM pg_index JOIN pg_class ON pg_class.oid = pg_index.indexrelid "
+        "WHERE pg_class.relname = :name AND NOT pg_index.indisvalid"
+    ), {"name": name}).first()
+    if invalid:
+        conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+    conn.execute(text(ddl))
+
+
+@outside_transaction
+def _search_vector(conn):
+    if not _is_postgres(conn):
+        return
+    generated = conn.execute(text(
+        "SELECT attgenerated FROM pg_attribute WHERE attrelid = 'tasks1'::regclass AND attname = 'search_vector'"
+    )).scalar()
+    # Databases migrated before the trigger existed keep their generated column
+    if not generated:
+        for statement in SEARCH_SCHEMA_DDL:
+            conn.execute(text(statement))
+        # Each batch commits on its own, so writers only wait on the rows being filled
+        while conn.execute(text(SEARCH_BACKFILL_SQL), {"batch_size": BACKFILL_BATCH_SIZE}).rowcount:
+            pass
+    _create_index_concurrently(conn, SEARCH_INDEX_NAME, SEARCH_INDEX_DDL)
+
+
+def _task_indexes(*indexes):
+    """Migration that builds the given `(name, columns)` indexes on tasks1.
+
+    The columns are spelled out here rather than read from the models, so
+    each version builds exactly the indexes it shipped with.
+    """
+    @outside_transaction
+    def apply(conn):
+        for name, columns in indexes:
+            columns = ", ".join(columns)
+            if _is_postgres(conn):
+                _create_index_concurrently(
+                    conn, name, f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON tasks1 ({columns})"
+                )
+            else:
+                conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON tasks1 ({columns})"))
+    return apply
+
+
+def _task_versions(conn):
+    task_versions.create(conn, checkfirst=True)
+
+
+def _task_changes(conn):
+    task_changes.create(conn, checkfirst=True)
+
+
+def _task_changes_floor(conn):
+    task_changes_floor.create(conn, checkfirst=True)
+    if conn.dialect.name == "sqlite":
+        # Rebuild the log with AUTOINCREMENT so pruned seqs are never reused
+        ddl = conn.execute(text("SELECT sql FROM sqlite_master WHERE name = 'task_changes'")).scalar()
+        if "AUTOINCREMENT" not in ddl.upper():
+            conn.execute(text("ALTER TABLE task_changes RENAME TO task_changes_old"))
+            for index in task_changes.indexes:
+                conn.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+            task_changes.create(conn)
+            conn.execute(text("INSERT INTO task_changes SELECT * FROM task_changes_old"))
+            conn.execute(text("DROP TABLE task_changes_old"))
+
+
+def _task_version_seqs(conn):
+    columns = {column["name"] for column in inspect(conn).get_columns("task_versions")}
+    for name in ("last_seq", "pruned_seq"):
+        if name not in columns:
+            conn.execute(text(f"ALTER TABLE task_versions ADD COLUMN {name} BIGINT NOT NULL DEFAULT 0"))
+    conn.execute(text(
+        "UPDATE task_versions SET last_seq = coalesce("
+        "(SELECT max(seq) FROM task_changes WHERE task_changes.user_id = task_versions.user_id), 0)"
+    ))
+    if inspect(conn).has_table("task_changes_floor"):
+        # Every user's cursors below the old global mark stay expired
+        floor = conn.execute(select(task_changes_floor.c.pruned_seq)).scalar() or 0
+        conn.execute(text("UPDATE task_versions SET pruned_seq = :floor WHERE pruned_seq < :floor"), {"floor": floor})
+        task_changes_floor.drop(conn)
+
+
+def _rate_limits(conn):
+    rate_limits.create(conn, checkfirst=True)
+
+
+MIGRATIONS = [
+    (1, "baseline users and tasks1 tables", _baseline),
+    (2, "sessions table, nullable tasks1.token", _sessions_table),
+    (3, "full-text search vector on tasks1", _search_vector),
+    (4, "per-user composite indexes on tasks1", _task_indexes(
+        ("ix_tasks1_user_id_id", ("user_id", "id")),
+        ("ix_tasks1_user_id_status_due_date", ("user_id", "status", "due_date")),
+    )),
+    (5, "per-user task version counters", _task_versions),
+    (6, "append-only task change log", _task_changes),
+    (7, "shared rate limit buckets", _rate_limits),
+    (8, "per-user created-at index on tasks1", _task_indexes(
+        ("ix_tasks1_user_id_time_of_generation", ("user_id", "time_of_generation")),
+    )),
+    (9, "status and due date index for the overdue job", _task_indexes(
+        ("ix_tasks1_status_due_date", ("status", "due_date")),
+    )),
+    (10, "pruned low-water mark for the task change log", _task_changes_floor),
+    (11, "per-user last and pruned change seqs on task_versions", _task_version_seqs),
+]
+
+# Column prefixes every hot query relies on, checked at startup
+REQUIRED_INDEXES = {
+    "users": [("username",)],
+    "tasks1": [("user_id", "id"), ("user_id", "status", "due_date"), ("user_id", "time_of_generation"),
+               ("status", "due_date")],
+    "task_changes": [("user_id", "seq")],
+}
+
+
+def applied_versions(conn):
+    schema_migrations.create(conn, checkfirst=True)
+    return {row.version for row in conn.execute(select(schema_migrations.c.version))}
+
+
+def run_migrations(bind=None):
+    """Apply every pending migration in order, each in its own transaction
+    unless it is marked `outside_transaction`."""
+    bind = bind if bind is not None else get_engine()
+    with bind.begin() as conn:
+        done = applied_versions(conn)
+
+    applied = []
+    for version, description, apply in MIGRATIONS:
+        if version in done:
+            continue
+        record = schema_migrations.insert().values(
+            version=version,
+            description=description,
+            applied_at=datetime.now(timezone.utc),
+        )
+        if getattr(apply, "outside_transaction", False):
+            with bind.connect() as conn:
+                apply(conn.execution_options(isolation_level="AUTOCOMMIT"))
+            with bind.begin() as conn:
+                conn.execute(record)
+        else:
+            with bind.begin() as conn:
+                apply(conn)
+                conn.execute(record)
+        logger.info("Applied migration %d: %s", version, description)
+        applied.append(version)
+    return applied
+
+
+def missing_indexes(bind=None):
+    inspector = inspect(bind if bind is not None else get_engine())
+    missing = []
+    for table, wanted in REQUIRED_INDEXES.items():
+        existing = [tuple(index["column_names"]) for index in inspector.get_indexes(table)]
+        existing += [tuple(unique["column_names"]) for unique in inspector.get_unique_constraints(table)]
+        for columns in wanted:
+            if not any(found[:len(columns)] == columns for found in existing):
+                missing.append((table, columns))
+    return missing
+
+
+def report_missing_indexes(bind=None):
+    missing = missing_indexes(bind)
+    for table, columns in missing:
+        logger.warning("Missing index on %s(%s); run `python -m app.migrations`", table, ", ".join(columns))
+    return missing
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    run_migrations()
+    report_missing_indexes()
@@ -1,4 +1,4 @@
-from sqlalchemy import Table, Column, Integer, String, Text, ForeignKey, TIMESTAMP, Date, VARCHAR
+from sqlalchemy import Table, Column, Integer, BigInteger, String, Text, ForeignKey, TIMESTAMP, Date, VARCHAR, Boolean, Float, Index
 from sqlalchemy.sql import func
 from app.database import metadata
 
@@ -18,9 +18,62 @@ tasks1 = Table(
     Column("id", Integer, primary_key=True),
     Column("title", Text, nullable=False),
     Column("description", Text),
-    Column("token", Text, nullable=False),
+    Column("token", Text, nullable=True),
     Column("time_of_generation", TIMESTAMP(timezone=True), server_default=func.now()),
     Column("status", VARCHAR(20), default="active"),
     Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE")),
     Column("due_date", Date, nullable=True),
+    # Per-user listing/lookup and dashboard filters
+    Index("ix_tasks1_user_id_id", "user_id", "id"),
+    Index("ix_tasks1_user_id_status_due_date", "user_id", "status", "due_date"),
+    Index("ix_tasks1_user_id_time_of_generation", "user_id", "time_of_generation"),
+    # Cross-user sweep for the overdue job
+    Index("ix_tasks1_status_due_date", "status", "due_date"),
+)
+
+sessions = Table(
+    "sessions",
+    metadata,
+    Column("jti", VARCHAR(64), primary_key=True),
+    Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+    Column("created_at", TIMESTAMP(timezone=True), server_default=func.now()),
+    Column("expires_at", TIMESTAMP(timezone=True), nullable=False, index=True),
+    Column("revoked", Boolean, nullable=False, default=False),
+)
+
+# Per-user change counter for the user's tasks, behind ETag/Last-Modified
+task_versions = Table(
+    "task_versions",
+    metadata,
+    Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+    Column("version", BigInteger, nullable=False, default=0),
+    Column("updated_at", TIMESTAMP(timezone=True), nullable=False, server_default=func.now()),
+    # The user's latest task_changes seq, and the highest of theirs pruned;
+    # a sync cursor below pruned_seq has missed changes and must resync
+    Column("last_seq", BigInteger, nullable=False, server_default="0"),
+    Column("pruned_seq", BigInteger, nullable=False, server_default="0"),
+)
+
+# Append-only log of task writes, read by the delta sync endpoint
+task_changes = Table(
+    "task_changes",
+    metadata,
+    Column("seq", BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True),
+    Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+    Column("task_id", Integer, nullable=False),
+    Column("op", VARCHAR(10), nullable=False),
+    Column("changed_at", TIMESTAMP(timezone=True), nullable=False, server_default=func.now()),
+    Index("ix_task_changes_user_id_seq", "user_id", "seq"),
+    # Without AUTOINCREMENT SQLite hands out seqs again once the log is pruned empty
+    sqlite_autoincrement=True,
+)
+
+# Shared token buckets for the database rate limit backend
+rate_limits = Table(
+    "rate_limits",
+    metadata,
+    Column("key", VARCHAR(255), primary_key=True),
+    Column("tokens", Float, nullable=False),
+    Column("updated_at", Float, nullable=False),
+    Column("allowed", Boolean, nullable=False),
 )
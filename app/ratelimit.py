@@ -0,0 +1,302 @@
+import hashlib
+import json
+import math
+import os
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+from fastapi.responses import JSONResponse
+from sqlalchemy import case, func
+from sqlalchemy.dialects import postgresql, sqlite
+from app.auth import decode_token_payload
+from app.database import database, is_postgres
+from app.models import rate_limits
+
+# Rate limit settings from environment variables. Rates are "<requests>/<seconds>";
+# an empty rate turns that policy off.
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_ALGORITHM = os.getenv("RATE_LIMIT_ALGORITHM", "token_bucket")
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+RATE_LIMIT_LOGIN_IP = os.getenv("RATE_LIMIT_LOGIN_IP", "60/60")
+RATE_LIMIT_LOGIN_USER = os.getenv("RATE_LIMIT_LOGIN_USER", "10/60")
+RATE_LIMIT_SIGNUP_IP = os.getenv("RATE_LIMIT_SIGNUP_IP", "60/3600")
+RATE_LIMIT_TASKS_USER = os.getenv("RATE_LIMIT_TASKS_USER", "")
+
+# Larger bodies are not parsed for a username
+MAX_KEY_BODY_BYTES = 64 * 1024
+
+
+class Rate:
+    def __init__(self, limit: int, period: float):
+        if limit < 1 or period <= 0:
+            raise ValueError("A rate needs a positive limit and period")
+        self.limit = limit
+        self.period = period
+
+    @classmethod
+    def parse(cls, value: str) -> "Rate":
+        limit, _, period = value.partition("/")
+        return cls(int(limit), float(period or 1))
+
+    @property
+    def per_second(self) -> float:
+        return self.limit / self.period
+
+
+class TokenBucket:
+    """Allows bursts of up to `limit` requests, refilled evenly over `period`."""
+
+    name = "token_bucket"
+
+    def __init__(self, rate: Rate):
+        self.rate = rate
+
+    def hit(self, state: Optional[list], now: float) -> Tuple[list, bool, float]:
+        if state is None:
+            tokens = float(self.rate.limit)
+        else:
+            tokens = min(self.rate.limit, state[0] + (now - state[1]) * self.rate.per_second)
+        if tokens >= 1:
+            return [tokens - 1, now], True, 0.0
+        return [tokens, now], False, (1 - tokens) / self.rate.per_second
+
+
+class SlidingWindow:
+    """Counts requests in the last `period`, weighting the previous fixed
+    window by how much of it still overlaps, so state stays three numbers."""
+
+    name = "sliding_window"
+
+    def __init__(self, rate: Rate):
+        self.rate = rate
+
+    def hit(self, state: Optional[list], now: float) -> Tuple[list, bool, float]:
+        period = self.rate.period
+        start = now - now % period
+        if state is None or state[0] < start - period:
+            previous, current = 0, 0
+        elif state[0] < start:
+            previous, current = state[2], 0
+        else:
+            previous, current = state[1], state[2]
+        weight = 1 - (now - start) / period
+        if previous * weight + current < self.rate.limit:
+            return [start, previous, current + 1], True, 0.0
+        # Wait until the previous window's share has decayed enough
+        if previous:
+            retry_after = max(0.0, (1 - (self.rate.limit - current) / previous) * period - (now - start))
+        else:
+            retry_after = start + period - now
+        return [start, previous, current], False, max(retry_after, 0.001)
+
+
+ALGORITHMS = {TokenBucket.name: TokenBucket, SlidingWindow.name: SlidingWindow}
+
+
+class MemoryBackend:
+    """Per-worker limiter state: a few floats per active key, LRU-evicted.
+
+    An evicted key starts over with a full allowance, so `max_keys` should
+    comfortably exceed the number of keys active within one period.
+    """
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._state: "OrderedDict[str, list]" = OrderedDict()
+
+    async def hit(self, key: str, algorithm, now: float) -> Tuple[bool, float]:
+        state, allowed, retry_after = algorithm.hit(self._state.get(key), now)
+        self._state[key] = state
+        self._state.move_to_end(key)
+        while len(self._state) > self.max_keys:
+            self._state.popitem(last=False)
+        return allowed, retry_after
+
+    async def purge_idle(self, before: float) -> int:
+        return 0
+
+    def __len__(self):
+        return len(self._state)
+
+
+class DatabaseBackend:
+    """Token buckets in the rate_limits table, shared by every worker.
+
+    Each hit is one atomic upsert that refills, spends and reports the
+    bucket, so concurrent workers cannot both take the last token.
+    """
+
+    def __init__(self, db=database):
+        self.db = db
+
+    async def hit(self, key: str, algorithm, now: float) -> Tuple[bool, float]:
+        if not isinstance(algorithm, TokenBucket):
+            raise ValueError("The database rate limit backend only supports token_bucket")
+        rate = algorithm.rate
+        least = func.least if is_postgres(self.db) else func.min
+        refilled = least(rate.limit, rate_limits.c.tokens + (now - rate_limits.c.updated_at) * rate.per_second)
+        insert = (postgresql if is_postgres(self.db) else sqlite).insert(rate_limits)
+        query = insert.values(key=key, tokens=rate.limit - 1, updated_at=now, allowed=True)
+        query = query.on_conflict_do_update(
+            index_elements=[rate_limits.c.key],
+            set_={
+                "tokens": case((refilled >= 1, refilled - 1), else_=refilled),
+                "updated_at": now,
+                "allowed": refilled >= 1,
+            },
+        ).returning(rate_limits.c.tokens, rate_limits.c.allowed)
+        row = await self.db.fetch_one(query)
+        if row["allowed"]:
+            return True, 0.0
+        return False, (1 - row["tokens"]) / rate.per_second
+
+    async def purge_idle(self, before: float) -> int:
+        query = rate_limits.delete().where(rate_limits.c.updated_at < before).returning(rate_limits.c.key)
+        return len(await self.db.fetch_all(query))
+
+
+def build_backend(name: str = RATE_LIMIT_BACKEND):
+    if name == "memory":
+        return MemoryBackend()
+    if name == "database":
+        return DatabaseBackend()
+    raise ValueError(f"Unknown rate limit backend: {name}")
+
+
+# Key functions take the ASGI scope and the buffered body and return the
+# value to limit on, or None to skip the policy for this request
+def client_ip(scope, body: bytes) -> Optional[str]:
+    client = scope.get("client")
+    return client[0] if client else None
+
+
+def body_username(scope, body: bytes) -> Optional[str]:
+    if not body or len(body) > MAX_KEY_BODY_BYTES:
+        return None
+    try:
+        username = json.loads(body).get("username")
+    except (ValueError, AttributeError):
+        return None
+    return username.lower() if isinstance(username, str) and username else None
+
+
+def token_subject(scope, body: bytes) -> Optional[str]:
+    for name, value in scope.get("headers", ()):
+        if name == b"authorization":
+            payload = decode_token_payload(value.decode("latin-1"))
+            return payload.get("sub") if payload else None
+    return None
+
+
+KEY_FUNCTIONS: Dict[str, Callable] = {"ip": client_ip, "username": body_username, "sub": token_subject}
+
+
+class Policy:
+    def __init__(self, name: str, methods, path: str, rate: Rate, key: str = "ip",
+                 algorithm: str = RATE_LIMIT_ALGORITHM, prefix: bool = False):
+        self.name = name
+        self.methods = set(methods)
+        self.path = path
+        self.prefix = prefix
+        self.rate = rate
+        self.key = key
+        self.key_function = KEY_FUNCTIONS[key]
+        self.algorithm = ALGORITHMS[algorithm](rate)
+
+    def matches(self, method: str, path: str) -> bool:
+        if method not in self.methods:
+            return False
+        return path.startswith(self.path) if self.prefix else path == self.path
+
+
+def default_policies() -> List[Policy]:
+    specs = [
+        ("login_ip", ["POST"], "/login", RATE_LIMIT_LOGIN_IP, "ip", False),
+        ("login_user", ["POST"], "/login", RATE_LIMIT_LOGIN_USER, "username", False),
+        ("signup_ip", ["POST"], "/signup", RATE_LIMIT_SIGNUP_IP, "ip", False),
+        ("tasks_user", ["GET", "POST", "PUT", "PATCH", "DELETE"], "/tasks", RATE_LIMIT_TASKS_USER, "sub", True),
+    ]
+    return [
+        Policy(name, methods, path, Rate.parse(rate), key, prefix=prefix)
+        for name, methods, path, rate, key, prefix in specs if rate
+    ]
+
+
+class RateLimiter:
+    def __init__(self, backend, policies: List[Policy]):
+        self.backend = backend
+        self.policies = policies
+        self.limited = 0
+
+    def policies_for(self, method: str, path: str) -> List[Policy]:
+        return [policy for policy in self.policies if policy.matches(method, path)]
+
+    async def check(self, policies: List[Policy], scope, body: bytes) -> Optional[Tuple[Policy, float]]:
+        """Spend one request from every matching policy; return the first
+        `(policy, retry_after)` that is exhausted, or None if all allow it."""
+        now = time.time()
+        for policy in policies:
+            value = policy.key_function(scope, body)
+            if value is None:
+                continue
+            key = f"{policy.name}:{value}"
+            if len(key) > 200:
+                key = f"{policy.name}:{hashlib.sha1(value.encode()).hexdigest()}"
+            allowed, retry_after = await self.backend.hit(key, policy.algorithm, now)
+            if not allowed:
+                self.limited += 1
+                return policy, retry_after
+        return None
+
+
+rate_limiter = RateLimiter(build_backend(), default_policies())
+
+
+class RateLimitMiddleware:
+    """Answers 429 with Retry-After before routing, validation, password
+    hashing or any query the endpoint would run."""
+
+    def __init__(self, app, limiter: RateLimiter = None, enabled: bool = RATE_LIMIT_ENABLED):
+        self.app = app
+        self.limiter = limiter or rate_limiter
+        self.enabled = enabled
+
+    async def __call__(self, scope, receive, send):
+        if not self.enabled or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        policies = self.limiter.policies_for(scope["method"], scope["path"])
+        if not policies:
+            await self.app(scope, receive, send)
+            return
+
+        # Buffer the body so key functions can read it, then replay it
+        body = b""
+        if any(policy.key == "username" for policy in policies):
+            messages = []
+            while True:
+                message = await receive()
+                messages.append(message)
+                if message["type"] != "http.request":
+                    break
+                body += message.get("body", b"")
+                if not message.get("more_body", False):
+                    break
+
+            async def replay():
+                return messages.pop(0) if messages else await receive()
+        else:
+            replay = receive
+
+        limited = await self.limiter.check(policies, scope, body)
+        if limited is not None:
+            policy, retry_after = limited
+            response = JSONResponse(
+                status_code=429,
+                content={"detail": "Too many requests, please retry later"},
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+            )
+            await response(scope, receive, send)
+            return
+        await self.app(scope, replay, send)
@@ -0,0 +1,54 @@
+import json
+from datetime import date, datetime
+from typing import Any, Iterable, List
+from fastapi.responses import Response
+from app.schemas import TaskOut
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+# Columns a task is serialized with, in TaskOut field order
+TASK_FIELDS: List[str] = list(TaskOut.model_fields)
+
+
+# Datetimes are written the way Pydantic writes them, with UTC as "Z"
+def _default(value: Any):
+    if isinstance(value, datetime):
+        text = value.isoformat()
+        return text[:-6] + "Z" if text.endswith("+00:00") else text
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+    return json.dumps(content, default=_default, separators=(",", ":")).encode()
+
+
+def task_dict(row, fields: Iterable[str] = TASK_FIELDS) -> dict:
+    # Rows come straight from tasks1, so they need no re-validation
+    return {field: row[field] for field in fields}
+
+
+def encode_tasks(rows, fields: Iterable[str] = TASK_FIELDS) -> bytes:
+    fields = list(fields)
+    return dumps([task_dict(row, fields) for row in rows])
+
+
+class FastJSONResponse(Response):
+    """JSON response rendered with orjson when it is installed.
+
+    Returning it from a route bypasses FastAPI's response_model validation and
+    encoding, so only use it for trusted data such as rows read from tasks1.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Awaitable, Callable, List, Optional
+from app.database import DATABASE_URL
+from app.metrics import job_duration, job_items, job_runs
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary constant shared by every worker; whoever holds it is the leader
+LEADER_LOCK_KEY = 0x7A5C_0001
+
+
+class LocalLeader:
+    """Every process is the leader: for SQLite and single-worker setups."""
+
+    is_leader = True
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+
+class AdvisoryLockLeader:
+    """Elects one worker across all processes with a Postgres advisory lock.
+
+    The lock is session-level and held on a dedicated connection, so it is
+    released by Postgres itself when the leader exits or its connection
+    drops; the other workers retry every `retry_seconds` and one takes over.
+    """
+
+    def __init__(self, url: str = DATABASE_URL, key: int = LEADER_LOCK_KEY, retry_seconds: float = 15.0):
+        self.url = url
+        self.key = key
+        self.retry_seconds = retry_seconds
+        self.is_leader = False
+        self._task: Optional[asyncio.Task] = None
+
+    async def _campaign(self):
+        import asyncpg
+
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(self.url)
+                while not connection.is_closed():
+                    if not self.is_leader:
+                        self.is_leader = await connection.fetchval("SELECT pg_try_advisory_lock($1)", self.key)
+                        if self.is_leader:
+                            logger.info("This worker is now the scheduler leader")
+                    else:
+                        # Keep checking the connection so a dead one gives up leadership
+                        await connection.fetchval("SELECT 1")
+                    await asyncio.sleep(self.retry_seconds)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Leader election connection failed")
+            finally:
+                if self.is_leader:
+                    logger.info("This worker is no longer the scheduler leader")
+                self.is_leader = False
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(self.retry_seconds)
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._campaign())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+class Job:
+    def __init__(self, name: str, interval: float, run: Callable[[], Awaitable[int]],
+                 leader_only: bool = True, until_empty: bool = False):
+        self.name = name
+        self.interval = interval
+        self.run = run
+        # Jobs on shared tables run on the leader only; jobs on per-process
+        # state (such as the in-memory session store) run in every worker
+        self.leader_only = leader_only
+        # One-off cleanups stop once a run finds nothing left to do
+        self.until_empty = until_empty
+
+
+class Scheduler:
+    """Runs periodic jobs as asyncio tasks beside the request handlers."""
+
+    def __init__(self, jobs: List[Job], leader=None):
+        self.jobs = jobs
+        self.leader = leader or LocalLeader()
+        self._tasks: List[asyncio.Task] = []
+
+    async def run_once(self, job: Job) -> Optional[int]:
+        if job.leader_only and not self.leader.is_leader:
+            return None
+        started = time.perf_counter()
+        try:
+            processed = await job.run()
+        except Exception:
+            job_runs.inc(1, job.name, "error")
+            logger.exception("Job %s failed", job.name)
+            return None
+        job_duration.observe(time.perf_counter() - started, job.name)
+        job_runs.inc(1, job.name, "ok")
+        job_items.inc(processed, job.name)
+        if processed:
+            logger.info("Job %s processed %d rows", job.name, processed)
+        return processed
+
+    async def _run_forever(self, job: Job):
+        # Spread the first runs so workers and jobs do not fire in lockstep
+        await asyncio.sleep(random.uniform(0, job.interval))
+        while True:
+            processed = await self.run_once(job)
+            if job.until_empty and processed == 0:
+                logger.info("Job %s has nothing left to do, stopping", job.name)
+                return
+            await asyncio.sleep(job.interval)
+
+    async def start(self):
+        if self._tasks:
+            return
+        await self.leader.start()
+        self._tasks = [asyncio.create_task(self._run_forever(job)) for job in self.jobs if job.interval > 0]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        await self.leader.stop()
+
+
+async def in_batches(step: Callable[[], Awaitable[int]], batch_size: int, max_batches: int) -> int:
+    """Call `step` until it handles fewer than `batch_size` rows, at most
+    `max_batches` times, yielding to request handlers between batches."""
+    total = 0
+    for _ in range(max_batches):
+        processed = await step()
+        total += processed
+        if processed < batch_size:
+            break
+        await asyncio.sleep(0)
+    return total
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, ConfigDict
-from typing import Optional
+from typing import Dict, List, Optional
 from datetime import date, datetime
 
 class UserSignup(BaseModel):
@@ -34,3 +34,46 @@ class TaskOut(TaskBase):
 
 class TokenData(BaseModel):
     username: Optional[str] = None
+
+# Bulk task endpoints
+MAX_BULK_ITEMS = 1000
+
+class TaskBulkUpdateItem(TaskUpdate):
+    id: int = Field(..., example=1)
+
+class TaskBulkDelete(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=MAX_BULK_ITEMS, example=[1, 2, 3])
+
+class BulkItemResult(BaseModel):
+    id: Optional[int] = None
+    status: str
+    task: Optional[TaskOut] = None
+
+class BulkResult(BaseModel):
+    results: List[BulkItemResult]
+
+# Delta sync
+class TaskChange(BaseModel):
+    op: str = Field(..., example="upsert")
+    id: int
+    task: Optional[TaskOut] = None
+
+class TaskChanges(BaseModel):
+    changes: List[TaskChange]
+    cursor: str
+    has_more: bool
+
+# Task statistics
+class TaskDueCounts(BaseModel):
+    overdue: int
+    today: int
+    this_week: int
+    later: int
+    no_due_date: int
+
+class TaskStats(BaseModel):
+    total: int
+    open: int
+    by_status: Dict[str, int] = Field(..., example={"active": 3, "completed": 5})
+    due: TaskDueCounts
+    today: date
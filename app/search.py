@@ -0,0 +1,157 @@
+import re
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, Optional, Set
+from sqlalchemy import case, false, func, literal_column
+from app.database import database, is_postgres
+from app.models import tasks1
+
+SEARCH_CONFIG = "english"
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+# On Postgres a trigger keeps the search vector current on inserts and
+# updates. A plain column filled by a trigger, unlike a STORED generated
+# column, is added without rewriting the table; the migration backfills
+# existing rows in batches and indexes them concurrently.
+SEARCH_SCHEMA_DDL = [
+    "ALTER TABLE tasks1 ADD COLUMN IF NOT EXISTS search_vector tsvector",
+    f"""
+    CREATE OR REPLACE FUNCTION tasks1_search_document(title text, description text) RETURNS tsvector
+    LANGUAGE sql IMMUTABLE AS $$
+        SELECT to_tsvector('{SEARCH_CONFIG}', coalesce(title, '') || ' ' || coalesce(description, ''))
+    $$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION tasks1_search_vector_update() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        NEW.search_vector := tasks1_search_document(NEW.title, NEW.description);
+        RETURN NEW;
+    END
+    $$
+    """,
+    "DROP TRIGGER IF EXISTS tasks1_search_vector_update ON tasks1",
+    """
+    CREATE TRIGGER tasks1_search_vector_update BEFORE INSERT OR UPDATE OF title, description ON tasks1
+    FOR EACH ROW EXECUTE FUNCTION tasks1_search_vector_update()
+    """,
+]
+SEARCH_BACKFILL_SQL = """
+    UPDATE tasks1 SET search_vector = tasks1_search_document(title, description)
+    WHERE id IN (SELECT id FROM tasks1 WHERE search_vector IS NULL LIMIT :batch_size)
+"""
+SEARCH_INDEX_NAME = "ix_tasks1_search_vector"
+SEARCH_INDEX_DDL = f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {SEARCH_INDEX_NAME} ON tasks1 USING GIN (search_vector)"
+
+search_vector = literal_column("tasks1.search_vector")
+
+
+def tokenize(value: Optional[str]):
+    return _WORD.findall(value.lower()) if value else []
+
+
+def prefix_tsquery(keyword: str) -> Optional[str]:
+    # Every word must match, each as a prefix: "fast ap" -> "fast:* & ap:*"
+    words = tokenize(keyword)
+    if not words:
+        return None
+    return " & ".join(f"{word}:*" for word in words)
+
+
+class InvertedIndex:
+    """Pure-Python full-text index used when the database is not Postgres."""
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._terms: list = []
+        self._owners: Dict[int, int] = {}
+        self._doc_terms: Dict[int, Set[str]] = {}
+
+    def add(self, task_id: int, user_id: int, title: Optional[str], description: Optional[str]):
+        self.remove(task_id)
+        counts = Counter(tokenize(title) + tokenize(description))
+        self._owners[task_id] = user_id
+        self._doc_terms[task_id] = set(counts)
+        for term, count in counts.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                self._terms.insert(bisect_left(self._terms, term), term)
+            postings[task_id] = count
+
+    def remove(self, task_id: int):
+        for term in self._doc_terms.pop(task_id, ()):
+            postings = self._postings[term]
+            postings.pop(task_id, None)
+            if not postings:
+                del self._postings[term]
+                del self._terms[bisect_left(self._terms, term)]
+        self._owners.pop(task_id, None)
+
+    def clear(self):
+        self._postings.clear()
+        self._terms.clear()
+        self._owners.clear()
+        self._doc_terms.clear()
+
+    def _prefix_matches(self, word: str) -> Dict[int, int]:
+        scores: Dict[int, int] = {}
+        i = bisect_left(self._terms, word)
+        while i < len(self._terms) and self._terms[i].startswith(word):
+            for task_id, count in self._postings[self._terms[i]].items():
+                scores[task_id] = scores.get(task_id, 0) + count
+            i += 1
+        return scores
+
+    def search(self, user_id: int, keyword: str) -> Dict[int, float]:
+        """Return `{task_id: score}` for the user's tasks matching every word."""
+        result: Optional[Dict[int, float]] = None
+        for word in tokenize(keyword):
+            matches = self._prefix_matches(word)
+            if result is None:
+                result = {task_id: float(score) for task_id, score in matches.items()
+                          if self._owners.get(task_id) == user_id}
+            else:
+                result = {task_id: score + matches[task_id] for task_id, score in result.items()
+                          if task_id in matches}
+            if not result:
+                return {}
+        return result or {}
+
+    async def build(self, db=database):
+        self.clear()
+        query = tasks1.select().with_only_columns(
+            tasks1.c.id, tasks1.c.user_id, tasks1.c.title, tasks1.c.description
+        )
+        async for row in db.iterate(query):
+            self.add(row["id"], row["user_id"], row["title"], row["description"])
+
+
+search_index = InvertedIndex()
+
+
+def search_clause(keyword: str, user_id: int):
+    """Build the match condition and rank expression for a keyword search."""
+    if is_postgres():
+        tsquery = prefix_tsquery(keyword)
+        if tsquery is None:
+            return false(), literal_column("0.0")
+        query = func.to_tsquery(SEARCH_CONFIG, tsquery)
+        return search_vector.op("@@")(query), func.ts_rank(search_vector, query)
+
+    scores = search_index.search(user_id, keyword)
+    if not scores:
+        return false(), literal_column("0.0")
+    return tasks1.c.id.in_(list(scores)), case(scores, value=tasks1.c.id, else_=0.0)
+
+
+# Keep the fallback index in step with task writes on non-Postgres backends
+def index_task(row):
+    if not is_postgres():
+        search_index.add(row["id"], row["user_id"], row["title"], row["description"])
+
+
+def unindex_task(task_id: int):
+    if not is_postgres():
+        search_index.remove(task_id)
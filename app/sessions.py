@@ -0,0 +1,106 @@
+import os
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Dict, Optional
+from sqlalchemy import and_, or_, select
+from app.database import database
+from app.models import sessions
+
+# Session store settings from environment variables
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "database")
+SESSION_PURGE_INTERVAL = float(os.getenv("SESSION_PURGE_INTERVAL", "300"))
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class SessionStore(ABC):
+    """Tracks issued token ids (`jti`) so tokens can be revoked before they expire."""
+
+    @abstractmethod
+    async def create(self, jti: str, user_id: int, expires_at: datetime):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def is_active(self, jti: str) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def revoke(self, jti: str):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def purge_expired(self, limit: Optional[int] = None) -> int:
+        """Drop up to `limit` expired or revoked sessions; all of them by default."""
+        raise NotImplementedError
+
+
+class DatabaseSessionStore(SessionStore):
+    def __init__(self, db):
+        self.db = db
+
+    async def create(self, jti: str, user_id: int, expires_at: datetime):
+        query = sessions.insert().values(jti=jti, user_id=user_id, expires_at=expires_at, revoked=False)
+        await self.db.execute(query)
+
+    async def is_active(self, jti: str) -> bool:
+        query = sessions.select().where(
+            and_(
+                sessions.c.jti == jti,
+                sessions.c.revoked.is_(False),
+                sessions.c.expires_at > _utcnow()
+            )
+        )
+        return await self.db.fetch_one(query) is not None
+
+    async def revoke(self, jti: str):
+        await self.db.execute(sessions.update().where(sessions.c.jti == jti).values(revoked=True))
+
+    async def purge_expired(self, limit: Optional[int] = None) -> int:
+        condition = or_(sessions.c.expires_at <= _utcnow(), sessions.c.revoked.is_(True))
+        if limit is not None:
+            condition = sessions.c.jti.in_(select(sessions.c.jti).where(condition).limit(limit))
+        query = sessions.delete().where(condition).returning(sessions.c.jti)
+        return len(await self.db.fetch_all(query))
+
+
+class MemorySessionStore(SessionStore):
+    """Process-local stand-in for tests and single-worker development."""
+
+    def __init__(self):
+        self._sessions: Dict[str, dict] = {}
+
+    async def create(self, jti: str, user_id: int, expires_at: datetime):
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        self._sessions[jti] = {"user_id": user_id, "expires_at": expires_at, "revoked": False}
+
+    async def is_active(self, jti: str) -> bool:
+        session = self._sessions.get(jti)
+        return session is not None and not session["revoked"] and session["expires_at"] > _utcnow()
+
+    async def revoke(self, jti: str):
+        if jti in self._sessions:
+            self._sessions[jti]["revoked"] = True
+
+    async def purge_expired(self, limit: Optional[int] = None) -> int:
+        now = _utcnow()
+        expired = [
+            jti for jti, session in self._sessions.items()
+            if session["revoked"] or session["expires_at"] <= now
+        ][:limit]
+        for jti in expired:
+            del self._sessions[jti]
+        return len(expired)
+
+
+def build_session_store(backend: str = SESSION_BACKEND) -> SessionStore:
+    if backend == "memory":
+        return MemorySessionStore()
+    if backend == "database":
+        return DatabaseSessionStore(database)
+    raise ValueError(f"Unknown session backend: {backend}")
+
+
+session_store = build_session_store()
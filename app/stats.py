@@ -0,0 +1,51 @@
+from datetime import date, timedelta
+from typing import Optional
+from sqlalchemy import func, select
+from app.models import tasks1
+
+# Statuses that count as done: their tasks are never overdue or due
+DONE_STATUSES = ("completed",)
+
+DUE_BUCKETS = ("overdue", "today", "this_week", "later", "no_due_date")
+
+
+def due_bucket(due_date: Optional[date], today: date) -> str:
+    # The week ends on Sunday; "this_week" is after today up to then
+    if due_date is None:
+        return "no_due_date"
+    if due_date < today:
+        return "overdue"
+    if due_date == today:
+        return "today"
+    if due_date <= today + timedelta(days=6 - today.weekday()):
+        return "this_week"
+    return "later"
+
+
+async def task_stats(db, user_id: int, today: date) -> dict:
+    """Counts of the user's tasks by status and, for open tasks, by due date.
+
+    One GROUP BY (status, due_date) that the ix_tasks1_user_id_status_due_date
+    index covers, so no task rows are read; the result has one row per
+    distinct status and due date, which is bucketed here.
+    """
+    query = (
+        select(tasks1.c.status, tasks1.c.due_date, func.count().label("count"))
+        .where(tasks1.c.user_id == user_id)
+        .group_by(tasks1.c.status, tasks1.c.due_date)
+    )
+    stats = {
+        "total": 0,
+        "open": 0,
+        "by_status": {},
+        "due": dict.fromkeys(DUE_BUCKETS, 0),
+        "today": today,
+    }
+    for row in await db.fetch_all(query):
+        status, count = row["status"] or "none", row["count"]
+        stats["total"] += count
+        stats["by_status"][status] = stats["by_status"].get(status, 0) + count
+        if status not in DONE_STATUSES:
+            stats["open"] += count
+            stats["due"][due_bucket(row["due_date"], today)] += count
+    return stats
@@ -0,0 +1,124 @@
+import json
+import logging
+import os
+import time
+from typing import Dict, List, Optional
+from jose import JWTError, jwt
+from app.cache import TTLCache
+from app.metrics import jwt_duration
+
+logger = logging.getLogger(__name__)
+
+# Token engine settings from environment variables. HMAC keys sign and verify
+# with the same secret; RS*/ES* keys sign with the private key and verify with
+# the public one, so nodes that only hold the public key can verify tokens.
+JWT_KEY_ID = os.getenv("JWT_KEY_ID", "default")
+JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
+JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "7a2bb4bfe69c4659833b87fd2a174c52a19a63a0dc34d795ad52b0e9e2c02858")
+JWT_PRIVATE_KEY_FILE = os.getenv("JWT_PRIVATE_KEY_FILE", "")
+JWT_PUBLIC_KEY_FILE = os.getenv("JWT_PUBLIC_KEY_FILE", "")
+# Retired keys still accepted for verification, as a JSON list of
+# {"kid", "algorithm", "secret" | "public_key_file"} objects
+JWT_PREVIOUS_KEYS = os.getenv("JWT_PREVIOUS_KEYS", "")
+JWT_VERIFY_CACHE_SIZE = int(os.getenv("JWT_VERIFY_CACHE_SIZE", "10000"))
+
+ASYMMETRIC_PREFIXES = ("RS", "PS", "ES")
+
+
+class TokenKey:
+    def __init__(self, kid: str, algorithm: str, signing_key: Optional[str] = None,
+                 verifying_key: Optional[str] = None):
+        self.kid = kid
+        self.algorithm = algorithm
+        if algorithm.startswith(ASYMMETRIC_PREFIXES):
+            self.signing_key = signing_key
+            self.verifying_key = verifying_key
+        else:
+            # HMAC: one shared secret does both
+            self.signing_key = self.verifying_key = signing_key or verifying_key
+        if self.verifying_key is None:
+            raise ValueError(f"Key {kid!r} has nothing to verify with")
+
+    @property
+    def can_sign(self) -> bool:
+        return self.signing_key is not None
+
+
+class TokenEngine:
+    """Signs and verifies JWTs with a set of keys identified by `kid`.
+
+    New tokens are signed with the active key and carry its `kid` in the
+    header; verification picks the key from that header, so rotating means
+    making a new key active and keeping the old one until its tokens expire.
+    Tokens without a `kid` (issued before key ids existed) verify with the
+    active key.
+
+    Verified tokens are kept in an LRU until they expire, so a token that is
+    presented again skips signature verification and only has its expiry
+    checked.
+    """
+
+    def __init__(self, active: TokenKey, previous: List[TokenKey] = (), cache_size: int = JWT_VERIFY_CACHE_SIZE):
+        self.active = active
+        self.keys: Dict[str, TokenKey] = {key.kid: key for key in previous}
+        self.keys[active.kid] = active
+        self.verified = TTLCache(maxsize=cache_size, ttl=float("inf"))
+
+    def encode(self, claims: dict) -> str:
+        if not self.active.can_sign:
+            raise RuntimeError(f"Key {self.active.kid!r} is verify-only and cannot sign tokens")
+        started = time.perf_counter()
+        token = jwt.encode(claims, self.active.signing_key, algorithm=self.active.algorithm,
+                           headers={"kid": self.active.kid})
+        jwt_duration.observe(time.perf_counter() - started, "encode")
+        return token
+
+    def decode(self, token: str) -> dict:
+        """Return the verified claims, or raise `JWTError`."""
+        cached = self.verified.get(token)
+        if cached is not None:
+            kid, claims = cached
+            # Dropping a key from the engine revokes its cached tokens too
+            if kid in self.keys and claims.get("exp", float("inf")) > time.time():
+                return claims
+            self.verified.delete(token)
+
+        started = time.perf_counter()
+        kid = jwt.get_unverified_header(token).get("kid") or self.active.kid
+        key = self.keys.get(kid)
+        if key is None:
+            raise JWTError(f"Unknown key id {kid!r}")
+        claims = jwt.decode(token, key.verifying_key, algorithms=[key.algorithm])
+        jwt_duration.observe(time.perf_counter() - started, "decode")
+
+        exp = claims.get("exp")
+        self.verified.set(token, (kid, claims), expires_at=exp if isinstance(exp, (int, float)) else None)
+        return claims
+
+
+def _read(path: str) -> Optional[str]:
+    if not path:
+        return None
+    with open(path) as handle:
+        return handle.read()
+
+
+def load_key(spec: dict) -> TokenKey:
+    return TokenKey(
+        spec["kid"],
+        spec.get("algorithm", "HS256"),
+        signing_key=spec.get("secret") or _read(spec.get("private_key_file", "")),
+        verifying_key=spec.get("secret") or _read(spec.get("public_key_file", "")),
+    )
+
+
+def build_token_engine() -> TokenEngine:
+    if JWT_ALGORITHM.startswith(ASYMMETRIC_PREFIXES):
+        active = TokenKey(JWT_KEY_ID, JWT_ALGORITHM, _read(JWT_PRIVATE_KEY_FILE), _read(JWT_PUBLIC_KEY_FILE))
+    else:
+        active = TokenKey(JWT_KEY_ID, JWT_ALGORITHM, JWT_SECRET_KEY)
+    previous = [load_key(spec) for spec in json.loads(JWT_PREVIOUS_KEYS)] if JWT_PREVIOUS_KEYS else []
+    return TokenEngine(active, previous)
+
+
+token_engine = build_token_engine()
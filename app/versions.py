@@ -0,0 +1,79 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional, Tuple
+from fastapi import Request
+from fastapi.responses import Response
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from app.database import is_postgres
+from app.models import task_versions
+
+
+def _upsert(db):
+    dialect = postgresql if is_postgres(db) else sqlite
+    return dialect.insert(task_versions)
+
+
+async def bump_version(db, user_id: int):
+    """Advance the user's task version; call after every committed task write."""
+    query = _upsert(db).values(user_id=user_id, version=1, updated_at=func.now())
+    query = query.on_conflict_do_update(
+        index_elements=[task_versions.c.user_id],
+        set_={"version": task_versions.c.version + 1, "updated_at": func.now()},
+    )
+    await db.execute(query)
+
+
+async def set_last_seq(db, user_id: int, seq: int):
+    # Kept on the version row so list reads get their sync cursor for free
+    query = task_versions.update().where(task_versions.c.user_id == user_id).values(last_seq=seq)
+    await db.execute(query)
+
+
+async def get_version(db, user_id: int) -> Tuple[int, Optional[datetime], int]:
+    """Return `(version, last_modified, last_seq)` for the user's tasks."""
+    query = task_versions.select().where(task_versions.c.user_id == user_id)
+    row = await db.fetch_one(query)
+    if row is None:
+        return 0, None, 0
+    updated_at = row["updated_at"]
+    if isinstance(updated_at, str):
+        updated_at = datetime.fromisoformat(updated_at)
+    if updated_at.tzinfo is None:
+        updated_at = updated_at.replace(tzinfo=timezone.utc)
+    return row["version"], updated_at, row["last_seq"]
+
+
+def make_etag(version: int, *parts) -> str:
+    # The body is a pure function of the version and the request parameters
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()[:16]
+    return f'"v{version}-{digest}"'
+
+
+def validator_headers(etag: str, last_modified: Optional[datetime]) -> dict:
+    headers = {"ETag": etag}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified.astimezone(timezone.utc), usegmt=True)
+    return headers
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # Weak comparison: a compressed response carries the W/ form of the tag
+        candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in candidates or etag.removeprefix("W/") in candidates
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+
+def not_modified_response(headers: dict) -> Response:
+    return Response(status_code=304, headers=headers)
+
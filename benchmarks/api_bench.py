@@ -0,0 +1,211 @@
+"""Load test for the API hot paths, driven in-process through ASGITransport.
+
+Usage:
+    python benchmarks/api_bench.py --database-url sqlite:///./bench.db \
+        --concurrency 20 --users 10 --tasks-per-user 200 --output bench_results.json
+    python benchmarks/api_bench.py --compare bench_results.json
+    python benchmarks/api_bench.py --base-url http://127.0.0.1:8000 --output workers.json
+
+Every run writes throughput and p50/p99 latency per operation as JSON, so a
+later run started with `--compare <previous.json>` prints the change per metric.
+With `--base-url` the requests go over HTTP to a running server instead, which
+is how multi-worker setups started with run.py are measured.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from contextlib import asynccontextmanager
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+
+
+def percentile(samples, pct):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies, errors, rate_limited, wall_seconds):
+    return {
+        "requests": len(latencies) + errors + rate_limited,
+        "errors": errors,
+        "rate_limited": rate_limited,
+        "throughput_rps": (len(latencies) / wall_seconds) if wall_seconds else None,
+        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else None,
+        "p50_ms": percentile(latencies, 50) * 1000 if latencies else None,
+        "p99_ms": percentile(latencies, 99) * 1000 if latencies else None,
+    }
+
+
+async def run_op(name, calls, concurrency, expected_status):
+    """Run every call with at most `concurrency` in flight and time each one."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors, rate_limited = [], 0, 0
+
+    async def timed(call):
+        nonlocal errors, rate_limited
+        async with semaphore:
+            started = time.perf_counter()
+            response = await call()
+            elapsed = time.perf_counter() - started
+        if response.status_code == expected_status:
+            latencies.append(elapsed)
+        elif response.status_code == 429:
+            # A server's limiter answering is not a failure of the endpoint
+            rate_limited += 1
+        else:
+            errors += 1
+        return response
+
+    started = time.perf_counter()
+    responses = await asyncio.gather(*(timed(call) for call in calls))
+    result = summarize(latencies, errors, rate_limited, time.perf_counter() - started)
+    print(f"{name:>8}: {result['requests']:6d} req  {result['throughput_rps'] or 0:9.1f} req/s  "
+          f"p50 {result['p50_ms'] or 0:8.2f} ms  p99 {result['p99_ms'] or 0:8.2f} ms  errors {errors}  429s {rate_limited}")
+    return result, responses
+
+
+@asynccontextmanager
+async def open_client(args):
+    from httpx import AsyncClient, Limits
+
+    if args.base_url:
+        limits = Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with AsyncClient(base_url=args.base_url, limits=limits, timeout=60) as client:
+            yield client
+        return
+
+    from httpx._transports.asgi import ASGITransport
+
+    # The lifespan sets up app logging to stdout, where per-request INFO lines
+    # (httpx logs every call) would bury the results and slow the run
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    from app.main import create_app
+    from app.migrations import run_migrations
+
+    run_migrations()
+    # Many users log in from one address here, which the limiter would refuse
+    app = create_app(rate_limit=False)
+
+    transport = ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with AsyncClient(transport=transport, base_url="http://bench") as client:
+            yield client
+
+
+async def benchmark(args):
+    run_id = uuid.uuid4().hex[:8]
+    results = {}
+    async with open_client(args) as client:
+        accounts = [
+            {"first_name": "Bench", "last_name": "User", "username": f"bench_{run_id}_{i}", "password": "benchpassword"}
+            for i in range(args.users)
+        ]
+        results["signup"], _ = await run_op(
+            "signup", [lambda a=a: client.post("/signup", json=a) for a in accounts], args.concurrency, 201)
+
+        results["login"], responses = await run_op(
+            "login",
+            [lambda a=a: client.post("/login", json={"username": a["username"], "password": a["password"]}) for a in accounts],
+            args.concurrency, 200)
+        headers = [{"Authorization": r.json()["access_token"]} for r in responses if r.status_code == 200]
+        if not headers:
+            raise SystemExit("No user could log in; check the database URL")
+
+        create_calls = [
+            lambda h=h, i=i: client.post("/tasks/", json={"title": f"Bench task {i}", "description": "benchmark"}, headers=h)
+            for h in headers for i in range(args.tasks_per_user)
+        ]
+        results["create"], responses = await run_op("create", create_calls, args.concurrency, 201)
+        task_refs = [(r.json()["id"], h) for r, h in zip(responses, [h for h in headers for _ in range(args.tasks_per_user)])
+                     if r.status_code == 201]
+
+        list_calls = [lambda h=headers[i % len(headers)]: client.get("/tasks/", headers=h) for i in range(args.requests)]
+        results["list"], _ = await run_op("list", list_calls, args.concurrency, 200)
+
+        sample = [task_refs[i % len(task_refs)] for i in range(args.requests)]
+        results["get"], _ = await run_op(
+            "get", [lambda t=t, h=h: client.get(f"/tasks/{t}", headers=h) for t, h in sample], args.concurrency, 200)
+        results["update"], _ = await run_op(
+            "update",
+            [lambda t=t, h=h: client.put(f"/tasks/{t}", json={"title": "Bench task", "status": "completed"}, headers=h)
+             for t, h in sample],
+            args.concurrency, 200)
+        results["delete"], _ = await run_op(
+            "delete", [lambda t=t, h=h: client.delete(f"/tasks/{t}", headers=h) for t, h in task_refs], args.concurrency, 200)
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=project_root, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(previous, current):
+    print("\nChange against previous run:")
+    for op, metrics in current["results"].items():
+        before = previous.get("results", {}).get(op)
+        if not before:
+            continue
+        parts = []
+        for key in ("throughput_rps", "p50_ms", "p99_ms"):
+            if before.get(key) and metrics.get(key) is not None:
+                parts.append(f"{key} {100 * (metrics[key] - before[key]) / before[key]:+.1f}%")
+        print(f"{op:>8}: " + "  ".join(parts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL", "sqlite:///./bench.db"))
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--tasks-per-user", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=500, help="requests per read/update operation")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="previous results file to diff against")
+    parser.add_argument("--base-url", help="benchmark a running server over HTTP instead of in-process")
+    args = parser.parse_args()
+
+    # The app reads its database settings at import time
+    os.environ["DATABASE_URL"] = args.database_url
+    results = asyncio.run(benchmark(args))
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": args.database_url.split("://")[0],
+            "base_url": args.base_url,
+            "concurrency": args.concurrency,
+            "users": args.users,
+            "tasks_per_user": args.tasks_per_user,
+            "requests": args.requests,
+        },
+        "results": results,
+    }
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
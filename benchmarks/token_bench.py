@@ -0,0 +1,81 @@
+"""Per-request cost of verifying an access token.
+
+Usage:
+    python benchmarks/token_bench.py --tokens 1000 --repeat 5
+
+Compares a plain `jose.jwt.decode` (what every request paid before the
+token engine), the engine on first sight of each token (signature check
+plus caching), and the engine on repeat requests (verified-token cache
+hit). ES256 is measured too, to size edge nodes that verify with a public
+key only.
+"""
+import argparse
+import os
+import sys
+import time
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+
+from ecdsa import NIST256p, SigningKey
+from jose import jwt
+from app.tokens import TokenEngine, TokenKey
+
+
+def make_engine(algorithm: str) -> TokenEngine:
+    if algorithm == "ES256":
+        private_key = SigningKey.generate(curve=NIST256p)
+        key = TokenKey("bench", algorithm, private_key.to_pem().decode(),
+                       private_key.get_verifying_key().to_pem().decode())
+    else:
+        key = TokenKey("bench", algorithm, "bench-secret")
+    return TokenEngine(key, cache_size=1000000)
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def bench(algorithm: str, count: int, repeat: int):
+    engine = make_engine(algorithm)
+    exp = int(time.time()) + 3600
+    tokens = [engine.encode({"sub": f"user{i}", "jti": str(i), "exp": exp}) for i in range(count)]
+    key = engine.active
+
+    def plain():
+        for token in tokens:
+            jwt.decode(token, key.verifying_key, algorithms=[key.algorithm])
+
+    def first_sight():
+        engine.verified.clear()
+        for token in tokens:
+            engine.decode(token)
+
+    def repeat_hit():
+        for token in tokens:
+            engine.decode(token)
+
+    results = {"jose decode": best_of(plain, repeat), "engine, cold": best_of(first_sight, repeat)}
+    results["engine, cached"] = best_of(repeat_hit, repeat)
+    for name, seconds in results.items():
+        print(f"{algorithm:6} {name:15} {seconds / count * 1e6:8.2f} us/token")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--algorithms", default="HS256,ES256")
+    args = parser.parse_args()
+
+    for algorithm in args.algorithms.split(","):
+        bench(algorithm, args.tokens, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
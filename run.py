@@ -1,5 +1,92 @@
+"""Start the API server.
+
+Usage:
+    python run.py --reload                # development: one process, auto-reload
+    python run.py --workers 8             # production
+
+Production mode forks `--workers` processes (default: one per CPU) behind
+one listening socket. Uvicorn's supervisor restarts a worker that dies,
+recycles each worker after `--max-requests` requests to cap slow memory
+growth, and on SIGHUP replaces all workers one by one without dropping the
+socket. uvloop and httptools are picked up automatically when installed
+(`pip install uvicorn[standard]`).
+
+Every setting also reads an environment variable, shown in `--help`.
+
+Pending schema migrations are applied once, in this process, before any
+worker starts; workers themselves never run DDL. Pass `--skip-migrations`
+when a deploy step already ran `python -m app.migrations`.
+
+Each worker opens its own database pool, so the primary sees up to
+workers x DB_POOL_MAX_SIZE connections; size max_connections to match.
+
+Measure the scaling on the target machine rather than assuming it: start
+the server with `--workers 1`, run
+`python benchmarks/api_bench.py --base-url http://127.0.0.1:8000 --output one.json`,
+restart with the production worker count, and rerun with `--compare one.json`.
+"""
+import argparse
+import importlib.util
+import logging
+import os
 import uvicorn
-from app.main import app
+
+logger = logging.getLogger(__name__)
+
+
+def env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
+
+
+def fastest(preferred: str, fallback: str) -> str:
+    return preferred if importlib.util.find_spec(preferred) else fallback
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.getenv("HOST", "127.0.0.1"), help="HOST")
+    parser.add_argument("--port", type=int, default=env_int("PORT", 8000), help="PORT")
+    parser.add_argument("--workers", type=int, default=env_int("WEB_CONCURRENCY", os.cpu_count() or 1),
+                        help="WEB_CONCURRENCY, defaults to the CPU count")
+    parser.add_argument("--max-requests", type=int, default=env_int("MAX_REQUESTS", 10000),
+                        help="MAX_REQUESTS, recycle a worker after this many requests (0 disables)")
+    parser.add_argument("--keep-alive", type=int, default=env_int("KEEP_ALIVE", 5),
+                        help="KEEP_ALIVE seconds; keep above the load balancer's idle timeout")
+    parser.add_argument("--backlog", type=int, default=env_int("BACKLOG", 2048), help="BACKLOG")
+    parser.add_argument("--graceful-timeout", type=int, default=env_int("GRACEFUL_TIMEOUT", 30),
+                        help="GRACEFUL_TIMEOUT seconds to finish in-flight requests on shutdown")
+    parser.add_argument("--reload", action="store_true", help="development mode: one process, auto-reload")
+    parser.add_argument("--skip-migrations", action="store_true", help="do not apply pending migrations first")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if not args.skip_migrations:
+        from app.migrations import run_migrations, report_missing_indexes
+        run_migrations()
+        report_missing_indexes()
+
+    if args.reload:
+        uvicorn.run("app.main:app", host=args.host, port=args.port, reload=True)
+        return
+
+    loop = fastest("uvloop", "asyncio")
+    http = fastest("httptools", "h11")
+    logger.info("Starting %d workers (loop=%s, http=%s)", args.workers, loop, http)
+    uvicorn.run(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        loop=loop,
+        http=http,
+        limit_max_requests=args.max_requests or None,
+        timeout_keep_alive=args.keep_alive,
+        backlog=args.backlog,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        proxy_headers=True,
+        access_log=False,
+    )
+
 
 if __name__ == "__main__":
-    uvicorn.run(app=app, host="127.0.0.1", port=8000, reload=True)
+    main()
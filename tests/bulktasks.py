@@ -0,0 +1,65 @@
+import pytest
+
+
+@pytest.fixture
+def username():
+    return "bulkuser1"
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_update_delete(test_client, get_token):
+    headers = {"Authorization": get_token}
+    payload = [{"title": f"Bulk task {i}", "due_date": "2025-09-06"} for i in range(3)]
+    response = await test_client.post("/tasks/bulk", json=payload, headers=headers)
+    assert response.status_code == 201
+    results = response.json()["results"]
+    assert [result["status"] for result in results] == ["created"] * 3
+    assert [result["task"]["title"] for result in results] == ["Bulk task 0", "Bulk task 1", "Bulk task 2"]
+    ids = [result["id"] for result in results]
+
+    payload = [
+        {"id": ids[0], "title": "Bulk task 0", "status": "completed"},
+        {"id": 0, "title": "Missing"},
+    ]
+    response = await test_client.patch("/tasks/bulk", json=payload, headers=headers)
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert results[0]["status"] == "updated"
+    assert results[0]["task"]["status"] == "completed"
+    assert results[1] == {"id": 0, "status": "not_found", "task": None}
+
+    response = await test_client.request("DELETE", "/tasks/bulk", json={"ids": ids + [0]}, headers=headers)
+    assert response.status_code == 200
+    statuses = [result["status"] for result in response.json()["results"]]
+    assert statuses == ["deleted", "deleted", "deleted", "not_found"]
+
+
+@pytest.mark.asyncio
+async def test_bulk_writes_that_change_nothing_keep_etags(test_client, get_token):
+    headers = {"Authorization": get_token}
+    created = (await test_client.post("/tasks/bulk", json=[{"title": "Kept"}], headers=headers)).json()
+    task_id = created["results"][0]["id"]
+    etag = (await test_client.get("/tasks/", headers=headers)).headers["ETag"]
+
+    await test_client.patch("/tasks/bulk", json=[{"id": 0, "title": "Missing"}, {"id": task_id}], headers=headers)
+    await test_client.request("DELETE", "/tasks/bulk", json={"ids": [0]}, headers=headers)
+    response = await test_client.get("/tasks/", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+
+
+@pytest.mark.asyncio
+async def test_bulk_delete_reports_repeated_ids_once(test_client, get_token):
+    headers = {"Authorization": get_token}
+    created = (await test_client.post("/tasks/bulk", json=[{"title": "Twice"}], headers=headers)).json()
+    task_id = created["results"][0]["id"]
+
+    response = await test_client.request("DELETE", "/tasks/bulk", json={"ids": [task_id, task_id]}, headers=headers)
+    assert [result["status"] for result in response.json()["results"]] == ["deleted", "not_found"]
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_empty_list(test_client, get_token):
+    headers = {"Authorization": get_token}
+    response = await test_client.post("/tasks/bulk", json=[], headers=headers)
+
+    assert response.status_code == 400
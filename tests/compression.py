@@ -0,0 +1,124 @@
+import gzip
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from httpx._transports.asgi import ASGITransport
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+from app.compression import CompressionMiddleware, choose_encoding
+
+
+async def large(request):
+    return JSONResponse([{"title": "Task", "index": i} for i in range(200)], headers={"ETag": '"abc"'})
+
+
+async def small(request):
+    return JSONResponse({"ok": True})
+
+
+async def events(request):
+    return PlainTextResponse("data: x\n\n" * 500, media_type="text/event-stream")
+
+
+async def ndjson(request):
+    async def lines():
+        for i in range(3):
+            yield f'{{"index": {i}}}\n'.encode()
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+demo = Starlette(routes=[Route("/large", large), Route("/small", small), Route("/events", events),
+                         Route("/ndjson", ndjson)])
+demo.add_middleware(CompressionMiddleware, minimum_size=512)
+
+
+@pytest_asyncio.fixture
+async def demo_client():
+    transport = ASGITransport(app=demo)
+    async with AsyncClient(transport=transport, base_url="http://test",
+                           headers={"Accept-Encoding": "gzip"}) as client:
+        yield client
+
+
+@pytest.fixture
+def username():
+    return "gzipuser1"
+
+
+@pytest_asyncio.fixture
+async def get_token(get_token, test_client):
+    headers = {"Authorization": get_token}
+    for i in range(40):
+        await test_client.post("/tasks/", json={"title": f"Compressed task {i}", "description": "x" * 40},
+                               headers=headers)
+    return get_token
+
+
+def test_choose_encoding():
+    assert choose_encoding("gzip, deflate") == "gzip"
+    assert choose_encoding("gzip;q=0") is None
+    assert choose_encoding("identity") is None
+    assert choose_encoding("*") in ("br", "gzip")
+
+
+@pytest.mark.asyncio
+async def test_large_json_is_gzipped(demo_client):
+    response = await demo_client.get("/large")
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["ETag"] == 'W/"abc"'
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert int(response.headers["Content-Length"]) < len(response.content)
+    assert len(response.json()) == 200
+
+
+@pytest.mark.asyncio
+async def test_small_and_event_stream_bodies_are_not_compressed(demo_client):
+    response = await demo_client.get("/small")
+    assert "Content-Encoding" not in response.headers
+    assert "Accept-Encoding" in response.headers["Vary"]
+
+    response = await demo_client.get("/events")
+    assert "Content-Encoding" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_streamed_body_is_compressed_per_chunk(demo_client):
+    async with demo_client.stream("GET", "/ndjson") as response:
+        raw = b"".join([chunk async for chunk in response.aiter_raw()])
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in response.headers
+    assert gzip.decompress(raw).decode().splitlines() == ['{"index": 0}', '{"index": 1}', '{"index": 2}']
+
+
+@pytest.mark.asyncio
+async def test_task_list_is_compressed_and_revalidates(test_client, get_token):
+    headers = {"Authorization": get_token, "Accept-Encoding": "gzip"}
+    response = await test_client.get("/tasks/", params={"limit": 40}, headers=headers)
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Cache-Control"] == "private, no-cache"
+    assert response.headers["ETag"].startswith("W/")
+
+    # The weak validator still matches the list it was issued for
+    response = await test_client.get("/tasks/", params={"limit": 40},
+                                     headers={**headers, "If-None-Match": response.headers["ETag"]})
+    assert response.status_code == 304
+
+
+@pytest.mark.asyncio
+async def test_auth_responses_are_not_stored(test_client, get_token):
+    response = await test_client.post("/login", json={"username": "gzipuser1", "password": "securepassword"})
+    assert response.headers["Cache-Control"] == "no-store"
+
+
+@pytest.mark.asyncio
+async def test_bulk_writes_are_not_stored(test_client, get_token):
+    headers = {"Authorization": get_token}
+    response = await test_client.post("/tasks/bulk", json=[{"title": "Bulk"}], headers=headers)
+    assert response.status_code == 201
+    assert response.headers["Cache-Control"] == "no-store"
+    ids = [result["id"] for result in response.json()["results"]]
+    response = await test_client.request("DELETE", "/tasks/bulk", json={"ids": ids}, headers=headers)
+    assert response.headers["Cache-Control"] == "no-store"
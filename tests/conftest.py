@@ -0,0 +1,88 @@
+import os
+import sys
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from httpx._transports.asgi import ASGITransport
+from dotenv import load_dotenv
+
+# Add the project root directory to PYTHONPATH
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+
+from app.main import create_app
+from app.database import database
+from app.migrations import run_migrations
+from app.models import users, tasks1
+
+load_dotenv()
+
+# The limiter's buckets outlive each test, so tests run without it
+app = create_app(rate_limit=False)
+
+
+@pytest_asyncio.fixture
+async def setup_database():
+    # Importing the app does not create the schema
+    run_migrations()
+    await database.connect()
+    yield
+    await database.disconnect()
+
+
+@pytest_asyncio.fixture
+async def test_client(setup_database):
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+@pytest_asyncio.fixture
+async def create_user(test_client):
+    """Signs a user up and logs them in, returning the access token.
+
+    Every user created is deleted after the test, along with their tasks.
+    """
+    created = []
+
+    async def create(username, password="securepassword", login=True):
+        signup_payload = {
+            "first_name": "Test",
+            "last_name": "User",
+            "username": username,
+            "password": password
+        }
+        await test_client.post("/signup", json=signup_payload)
+        created.append(username)
+        if not login:
+            return None
+
+        login_payload = {
+            "username": username,
+            "password": password
+        }
+        login_response = await test_client.post("/login", json=login_payload)
+        token = login_response.json().get("access_token")
+        if not token:
+            raise ValueError("Failed to retrieve access token")
+        return token
+
+    yield create
+
+    # Cleanup: delete tasks first, then users
+    for username in created:
+        user = await database.fetch_one(users.select().where(users.c.username == username))
+        if user:
+            await database.execute(tasks1.delete().where(tasks1.c.user_id == user.id))
+            await database.execute(users.delete().where(users.c.id == user.id))
+
+
+@pytest.fixture
+def username():
+    # Modules override this so their users never collide
+    return "testuser1"
+
+
+@pytest_asyncio.fixture
+async def get_token(create_user, username):
+    return await create_user(username)
@@ -1,62 +1,9 @@
-import os
-import sys
 import pytest
-import pytest_asyncio
-from httpx import AsyncClient
-from httpx._transports.asgi import ASGITransport
-from dotenv import load_dotenv
 
-# Add the project root directory to PYTHONPATH
-project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-sys.path.append(project_root)
 
-from app.main import app
-from app.database import database
-from app.models import users, tasks1
-
-load_dotenv()
-
-
-@pytest_asyncio.fixture
-async def setup_database():
-    await database.connect()
-    yield
-    await database.disconnect()
-
-
-@pytest_asyncio.fixture
-async def test_client(setup_database):
-    transport = ASGITransport(app=app)
-    async with AsyncClient(transport=transport, base_url="http://test") as client:
-        yield client
-
-
-@pytest_asyncio.fixture
-async def get_token(test_client):
-    # Create test user
-    signup_payload = {
-        "first_name": "John224",
-        "last_name": "Doe",
-        "username": "johndoe224",
-        "password": "securepassword"
-    }
-    signup_response = await test_client.post("/signup", json=signup_payload)
-    print("Signup Response:", signup_response.status_code, signup_response.json())  # Debugging
-
-    login_payload = {
-        "username": "johndoe224",
-        "password": "securepassword"
-    }
-    login_response = await test_client.post("/login", json=login_payload)
-    print("Login Response:", login_response.status_code, login_response.json())  # Debugging
-
-    # Retrieve the token
-    token = login_response.json().get("access_token")
-    print("Retrieved Token:", token)  # Debugging
-    if not token:
-        raise ValueError("Failed to retrieve access token")
-
-    yield token
+@pytest.fixture
+def username():
+    return "johndoe224"
 
 
 # ✅ Positive Test Case
@@ -0,0 +1,57 @@
+import pytest
+
+from app.database import database
+from app.events import EventBus, MemoryEventBus, event_bus, sse_frame
+from app.models import users
+
+
+@pytest.fixture
+def username():
+    return "eventuser1"
+
+
+@pytest.mark.asyncio
+async def test_task_writes_reach_subscribers(test_client, get_token):
+    headers = {"Authorization": get_token}
+    user = await database.fetch_one(users.select().where(users.c.username == "eventuser1"))
+    subscription = event_bus.subscribe(user.id)
+    other = event_bus.subscribe(user.id + 1000000)
+    try:
+        created = (await test_client.post("/tasks/", json={"title": "Pushed"}, headers=headers)).json()
+        await test_client.delete(f"/tasks/{created['id']}", headers=headers)
+
+        assert await subscription.get(1) == {"op": "upsert", "ids": [created["id"]]}
+        assert await subscription.get(1) == {"op": "delete", "ids": [created["id"]]}
+        assert await other.get(0.01) is None
+    finally:
+        subscription.close()
+        other.close()
+    assert event_bus.subscriber_count == 0
+
+
+@pytest.mark.asyncio
+async def test_task_events_requires_auth(test_client):
+    response = await test_client.get("/tasks/events")
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_overflows_instead_of_growing():
+    bus = MemoryEventBus(queue_size=2)
+    subscription = bus.subscribe(1)
+    for task_id in range(3):
+        await bus.publish(None, 1, upserted=[task_id])
+
+    assert subscription.overflowed
+    assert await subscription.get(0) == {"op": "upsert", "ids": [0]}
+    assert await subscription.get(0) == {"op": "upsert", "ids": [1]}
+    assert await subscription.get(0.01) is None
+
+
+def test_sse_frame_format():
+    assert sse_frame({"op": "delete", "ids": [3]}) == b'event: tasks\ndata: {"op":"delete","ids":[3]}\n\n'
+
+
+def test_event_bus_requires_publish():
+    with pytest.raises(TypeError):
+        EventBus()
@@ -0,0 +1,278 @@
+import json
+import pytest
+import pytest_asyncio
+
+from app.database import database
+from app import changes
+from app.events import MemoryEventBus
+from app.pagination import encode_cursor
+
+
+@pytest.fixture
+def username():
+    return "pageuser1"
+
+
+@pytest_asyncio.fixture
+async def get_token(get_token, test_client):
+    headers = {"Authorization": get_token}
+    for i in range(5):
+        await test_client.post("/tasks/", json={"title": f"Page task {i}"}, headers=headers)
+    return get_token
+
+
+@pytest.mark.asyncio
+async def test_get_tasks_paginates_with_cursor(test_client, get_token):
+    headers = {"Authorization": get_token}
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = await test_client.get("/tasks/", params=params, headers=headers)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page) <= 2
+        seen.extend(task["id"] for task in page if task["title"].startswith("Page task"))
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert len(seen) == 5
+    assert seen == sorted(seen)
+
+
+@pytest.mark.asyncio
+async def test_get_tasks_invalid_cursor(test_client, get_token):
+    headers = {"Authorization": get_token}
+    response = await test_client.get("/tasks/", params={"cursor": "not-a-cursor"}, headers=headers)
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+    # A title cursor must carry a string, or Postgres would reject the comparison
+    cursor = encode_cursor({"id": 1, "sort": "title", "value": 5})
+    response = await test_client.get("/tasks/", params={"sort": "title", "cursor": cursor}, headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+@pytest.mark.asyncio
+async def test_get_tasks_stream_ndjson(test_client, get_token):
+    headers = {"Authorization": get_token}
+    response = await test_client.get("/tasks/", params={"stream": "true"}, headers=headers)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines() if line]
+    assert len([task for task in lines if task["title"].startswith("Page task")]) == 5
+
+
+@pytest.mark.asyncio
+async def test_get_tasks_search_prefix(test_client, get_token):
+    headers = {"Authorization": get_token}
+    response = await test_client.get("/tasks/", params={"search_keyword": "pag"}, headers=headers)
+    assert response.status_code == 200
+    assert len(response.json()) == 5
+
+    response = await test_client.get("/tasks/", params={"search_keyword": "task 3"}, headers=headers)
+    assert response.status_code == 200
+    assert [task["title"] for task in response.json()] == ["Page task 3"]
+
+
+@pytest.mark.asyncio
+async def test_get_tasks_conditional_get(test_client, get_token):
+    headers = {"Authorization": get_token}
+    response = await test_client.get("/tasks/", headers=headers)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    assert "Last-Modified" in response.headers
+
+    response = await test_client.get("/tasks/", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+    await test_client.post("/tasks/", json={"title": "Page task 5"}, headers=headers)
+    response = await test_client.get("/tasks/", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+@pytest.mark.asyncio
+async def test_get_task_conditional_get(test_client, get_token):
+    headers = {"Authorization": get_token}
+    task_id = (await test_client.get("/tasks/", headers=headers)).json()[0]["id"]
+    response = await test_client.get(f"/tasks/{task_id}", headers=headers)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+
+    response = await test_client.get(f"/tasks/{task_id}", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+
+
+@pytest.mark.asyncio
+async def test_get_task_changes_since_cursor(test_client, get_token):
+    headers = {"Authorization": get_token}
+    response = await test_client.get("/tasks/changes", headers=headers)
+    assert response.status_code == 200
+    cursor = response.json()["cursor"]
+
+    created = (await test_client.post("/tasks/", json={"title": "Delta task"}, headers=headers)).json()
+    removed = (await test_client.get("/tasks/", headers=headers)).json()[0]["id"]
+    await test_client.delete(f"/tasks/{removed}", headers=headers)
+
+    response = await test_client.get("/tasks/changes", params={"since": cursor}, headers=headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["has_more"] is False
+    assert body["changes"] == [
+        {"op": "upsert", "id": created["id"], "task": created},
+        {"op": "delete", "id": removed},
+    ]
+
+    response = await test_client.get("/tasks/changes", params={"since": body["cursor"]}, headers=headers)
+    assert response.json()["changes"] == []
+
+
+@pytest.mark.asyncio
+async def test_full_sync_cursor_comes_with_the_list(test_client, get_token):
+    headers = {"Authorization": get_token}
+    response = await test_client.get("/tasks/", params={"limit": 100}, headers=headers)
+    cursor = response.headers["X-Changes-Cursor"]
+    listed = {task["id"] for task in response.json()}
+
+    created = (await test_client.post("/tasks/", json={"title": "After sync"}, headers=headers)).json()
+    response = await test_client.get("/tasks/changes", params={"since": cursor}, headers=headers)
+    assert [change["id"] for change in response.json()["changes"]] == [created["id"]]
+    assert created["id"] not in listed
+
+
+class RecordingDatabase:
+    """Records the table each write goes to, in order."""
+
+    url = database.url
+
+    def __init__(self):
+        self.tables = []
+
+    async def execute(self, query):
+        self.tables.append(query.table.name)
+
+    async def fetch_all(self, query):
+        self.tables.append(query.table.name)
+        return [{"seq": 1}]
+
+
+@pytest.mark.asyncio
+async def test_change_seq_is_taken_under_the_version_lock(monkeypatch):
+    # The Postgres bus would send pg_notify through the recording database
+    monkeypatch.setattr(changes, "event_bus", MemoryEventBus())
+    db = RecordingDatabase()
+    await changes.tasks_changed(1, upserted=[1], db=db)
+    # The task_versions upsert locks the user's row before the seq is
+    # allocated; the seq is then stored back on that row
+    assert db.tables == ["task_versions", "task_changes", "task_versions"]
+
+
+@pytest.mark.asyncio
+async def test_get_task_stats(test_client, get_token):
+    headers = {"Authorization": get_token}
+    # Wednesday: the week runs through Sunday 2025-06-08
+    params = {"today": "2025-06-04"}
+    for due_date in ("2025-06-01", "2025-06-04", "2025-06-08", "2025-06-20"):
+        await test_client.post("/tasks/", json={"title": "Due task", "due_date": due_date}, headers=headers)
+    done = await test_client.post("/tasks/", json={"title": "Done", "due_date": "2025-06-01"}, headers=headers)
+    await test_client.put(f"/tasks/{done.json()['id']}", json={"title": "Done", "status": "completed"}, headers=headers)
+
+    response = await test_client.get("/tasks/stats", params=params, headers=headers)
+    assert response.status_code == 200
+    stats = response.json()
+    assert stats["total"] == 10
+    assert stats["open"] == 9
+    assert stats["by_status"] == {"active": 9, "completed": 1}
+    assert stats["due"] == {"overdue": 1, "today": 1, "this_week": 1, "later": 1, "no_due_date": 5}
+
+    response = await test_client.get(
+        "/tasks/stats", params=params, headers={**headers, "If-None-Match": response.headers["ETag"]}
+    )
+    assert response.status_code == 304
+
+
+@pytest.mark.asyncio
+async def test_get_tasks_filters_sorts_and_sparse_fields(test_client, get_token):
+    headers = {"Authorization": get_token}
+    for title, due_date in (("Due c", "2025-06-03"), ("Due a", "2025-06-01"), ("Due b", "2025-06-02"), ("Due x", "2025-07-01")):
+        await test_client.post("/tasks/", json={"title": title, "due_date": due_date}, headers=headers)
+
+    params = {
+        "status": "active,completed",
+        "due_from": "2025-06-01",
+        "due_to": "2025-06-30",
+        "sort": "-due_date",
+        "fields": "title,due_date",
+        "limit": 2,
+    }
+    response = await test_client.get("/tasks/", params=params, headers=headers)
+    assert response.status_code == 200
+    assert response.json() == [
+        {"title": "Due c", "due_date": "2025-06-03"},
+        {"title": "Due b", "due_date": "2025-06-02"},
+    ]
+
+    params["cursor"] = response.headers["X-Next-Cursor"]
+    response = await test_client.get("/tasks/", params=params, headers=headers)
+    assert response.json() == [{"title": "Due a", "due_date": "2025-06-01"}]
+    assert "X-Next-Cursor" not in response.headers
+
+    # A cursor only continues the sort it was issued for
+    params["sort"] = "due_date"
+    response = await test_client.get("/tasks/", params=params, headers=headers)
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_get_tasks_sort_puts_missing_due_dates_last(test_client, get_token):
+    headers = {"Authorization": get_token}
+    await test_client.post("/tasks/", json={"title": "Dated", "due_date": "2025-06-01"}, headers=headers)
+
+    seen = []
+    params = {"sort": "due_date", "fields": "id,due_date", "limit": 2}
+    while True:
+        response = await test_client.get("/tasks/", params=params, headers=headers)
+        seen.extend(response.json())
+        if "X-Next-Cursor" not in response.headers:
+            break
+        params["cursor"] = response.headers["X-Next-Cursor"]
+    assert [task["due_date"] for task in seen] == ["2025-06-01"] + [None] * 5
+    assert len({task["id"] for task in seen}) == 6
+
+
+@pytest.mark.asyncio
+async def test_get_tasks_pages_through_created_at_sort(test_client, get_token):
+    headers = {"Authorization": get_token}
+    for sort in ("time_of_generation", "-time_of_generation"):
+        seen = []
+        params = {"sort": sort, "fields": "id,time_of_generation", "limit": 2}
+        while True:
+            response = await test_client.get("/tasks/", params=params, headers=headers)
+            seen.extend(response.json())
+            if "X-Next-Cursor" not in response.headers:
+                break
+            params["cursor"] = response.headers["X-Next-Cursor"]
+        assert len({task["id"] for task in seen}) == 5
+
+    # Created-at bounds are inclusive, down to the stored second
+    created = seen[-1]["time_of_generation"]
+    params = {"created_from": created, "created_to": created, "fields": "id"}
+    response = await test_client.get("/tasks/", params=params, headers=headers)
+    assert seen[-1]["id"] in [task["id"] for task in response.json()]
+
+
+@pytest.mark.asyncio
+async def test_get_tasks_rejects_unknown_fields_and_sort(test_client, get_token):
+    headers = {"Authorization": get_token}
+    response = await test_client.get("/tasks/", params={"fields": "id,password"}, headers=headers)
+    assert response.status_code == 400
+    response = await test_client.get("/tasks/", params={"sort": "user_id"}, headers=headers)
+    assert response.status_code == 400
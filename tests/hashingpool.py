@@ -0,0 +1,38 @@
+import os
+import sys
+import time
+import asyncio
+import pytest
+from fastapi import HTTPException
+
+# Add the project root directory to PYTHONPATH
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+
+from app.hashing import HashingPool
+
+
+@pytest.mark.asyncio
+async def test_pool_runs_work_off_the_event_loop():
+    pool = HashingPool("thread", workers=2, max_pending=4)
+    try:
+        result = await pool.run(sum, [1, 2, 3])
+        assert result == 6
+        assert pool.pending == 0
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_pool_rejects_when_saturated():
+    pool = HashingPool("thread", workers=1, max_pending=1)
+    try:
+        slow = asyncio.ensure_future(pool.run(time.sleep, 0.2))
+        await asyncio.sleep(0)
+        with pytest.raises(HTTPException) as exc:
+            await pool.run(time.sleep, 0)
+        assert exc.value.status_code == 503
+        assert exc.value.headers["Retry-After"] == "1"
+        await slow
+    finally:
+        pool.shutdown()
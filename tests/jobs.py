@@ -0,0 +1,92 @@
+from datetime import date
+import pytest
+from sqlalchemy import func, select
+
+from app.database import database
+from app.models import users, tasks1, task_changes
+from app.jobs import mark_overdue_batch, purge_legacy_login_rows_batch, prune_change_log_batch
+from app.scheduler import Job, Scheduler, in_batches
+from app.pagination import encode_cursor
+
+
+@pytest.fixture
+def username():
+    return "jobuser1"
+
+
+@pytest.mark.asyncio
+async def test_mark_overdue_in_batches(test_client, get_token):
+    headers = {"Authorization": get_token}
+    ids = []
+    for due_date in ("2025-06-01", "2025-06-02", "2025-06-03", "2025-06-10"):
+        response = await test_client.post("/tasks/", json={"title": "Due", "due_date": due_date}, headers=headers)
+        ids.append(response.json()["id"])
+    await test_client.put(f"/tasks/{ids[0]}", json={"title": "Done", "status": "completed"}, headers=headers)
+    etag = (await test_client.get("/tasks/", headers=headers)).headers["ETag"]
+
+    processed = await in_batches(lambda: mark_overdue_batch(today=date(2025, 6, 5), batch_size=1), 1, 10)
+    assert processed == 2
+
+    tasks = {task["id"]: task["status"] for task in (await test_client.get("/tasks/", headers=headers)).json()}
+    assert [tasks[task_id] for task_id in ids] == ["completed", "overdue", "overdue", "active"]
+    # The sweep counts as a write: cached lists are invalidated
+    response = await test_client.get("/tasks/", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_purge_legacy_login_rows(test_client, get_token):
+    headers = {"Authorization": get_token}
+    user = await database.fetch_one(users.select().where(users.c.username == "jobuser1"))
+    await database.execute(tasks1.insert().values(
+        title="Login Token", description="JWT token generated on login", token="old.jwt.token",
+        status="active", user_id=user.id,
+    ))
+    await test_client.post("/tasks/", json={"title": "Login Token"}, headers=headers)
+
+    assert await in_batches(purge_legacy_login_rows_batch, 500, 10) == 1
+    titles = [task["title"] for task in (await test_client.get("/tasks/", headers=headers)).json()]
+    assert titles == ["Login Token"]
+
+
+@pytest.mark.asyncio
+async def test_prune_change_log_drops_old_entries(test_client, get_token):
+    headers = {"Authorization": get_token}
+    await test_client.post("/tasks/", json={"title": "Logged"}, headers=headers)
+    assert await database.fetch_val(select(func.count()).select_from(task_changes)) > 0
+
+    await in_batches(lambda: prune_change_log_batch(retention_days=0), 500, 1000)
+    assert await database.fetch_val(select(func.count()).select_from(task_changes)) == 0
+
+    # An emptied log still knows what it dropped: old cursors must resync
+    response = await test_client.get("/tasks/changes", params={"since": encode_cursor({"seq": 0})}, headers=headers)
+    assert response.status_code == 410
+    cursor = (await test_client.get("/tasks/changes", headers=headers)).json()["cursor"]
+    created = (await test_client.post("/tasks/", json={"title": "After prune"}, headers=headers)).json()
+    response = await test_client.get("/tasks/changes", params={"since": cursor}, headers=headers)
+    assert response.status_code == 200
+    assert [change["id"] for change in response.json()["changes"]] == [created["id"]]
+
+
+class Follower:
+    is_leader = False
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_leader_only_jobs_skip_followers():
+    calls = []
+
+    async def run():
+        calls.append(1)
+        return 0
+
+    scheduler = Scheduler([Job("shared", 60, run), Job("local", 60, run, leader_only=False)], Follower())
+    assert await scheduler.run_once(scheduler.jobs[0]) is None
+    assert await scheduler.run_once(scheduler.jobs[1]) == 0
+    assert calls == [1]
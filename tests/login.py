@@ -1,61 +1,20 @@
-import os
-import sys
 import pytest
 import pytest_asyncio
 import logging
-from httpx import AsyncClient
-from httpx._transports.asgi import ASGITransport
-from dotenv import load_dotenv
+
+from app.auth import decode_token_payload
+from app.cache import session_cache
+from app.sessions import SessionStore, session_store
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Add the project root directory to PYTHONPATH
-project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-sys.path.append(project_root)
-
-from app.main import app
-from app.database import database
-from app.models import users, tasks1  # Assuming tasks1 is the user tasks table
-
-# Load environment variables
-load_dotenv()
-
 
 @pytest_asyncio.fixture
-async def setup_database():
-    await database.connect()
-    yield
-    await database.disconnect()
-
-
-@pytest_asyncio.fixture
-async def test_client(setup_database):
-    transport = ASGITransport(app=app)
-    async with AsyncClient(transport=transport, base_url="http://test") as client:
-        yield client
-
-
-@pytest_asyncio.fixture
-async def create_test_user(test_client):
-    payload = {
-        "first_name": "Test1",
-        "last_name": "User1",
-        "username": "testloginuser1",
-        "password": "1234567891"
-    }
+async def create_test_user(create_user):
     # Register user through the signup endpoint
-    await test_client.post("/signup", json=payload)
-
-    yield
-
-    # Cleanup: get user id, delete tasks first, then user
-    user_query = users.select().where(users.c.username == "testloginuser1")
-    user = await database.fetch_one(user_query)
-    if user:
-        await database.execute(tasks1.delete().where(tasks1.c.user_id == user.id))
-        await database.execute(users.delete().where(users.c.id == user.id))
+    await create_user("testloginuser1", password="1234567891", login=False)
 
 
 @pytest.mark.asyncio
@@ -86,7 +45,6 @@ async def test_login_invalid_password(test_client, create_test_user):
     logger.info(f"[INVALID PASSWORD] Status: {response.status_code}, Body: {response.json()}")
 
 
-
 @pytest.mark.asyncio
 async def test_login_nonexistent_user(test_client):
     payload = {
@@ -123,3 +81,55 @@ async def test_login_empty_fields(test_client):
 
     assert response.status_code == 400
     assert response.json()["detail"] == "Invalid username or password"
+
+
+@pytest.mark.asyncio
+async def test_logout_revokes_token(test_client, create_test_user):
+    payload = {
+        "username": "testloginuser1",
+        "password": "1234567891"
+    }
+    login_response = await test_client.post("/login", json=payload)
+    headers = {"Authorization": login_response.json()["access_token"]}
+
+    response = await test_client.get("/tasks/", headers=headers)
+    assert response.status_code == 200
+    # Logging in must not create tasks any more
+    assert response.json() == []
+
+    response = await test_client.post("/logout", headers=headers)
+    assert response.status_code == 200
+
+    response = await test_client.get("/tasks/", headers=headers)
+    logger.info(f"[AFTER LOGOUT] Status: {response.status_code}, Body: {response.json()}")
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_revocation_elsewhere_reaches_cached_tokens(test_client, create_test_user, monkeypatch):
+    payload = {
+        "username": "testloginuser1",
+        "password": "1234567891"
+    }
+    login_response = await test_client.post("/login", json=payload)
+    token = login_response.json()["access_token"]
+    headers = {"Authorization": token}
+    # With no session cache window the check runs on every request
+    monkeypatch.setattr(session_cache, "ttl", 0)
+
+    response = await test_client.get("/tasks/", headers=headers)
+    assert response.status_code == 200
+
+    # Another worker logs the token out: this worker's caches are untouched
+    await session_store.revoke(decode_token_payload(token)["jti"])
+    response = await test_client.get("/tasks/", headers=headers)
+    assert response.status_code == 401
+
+
+def test_session_store_requires_every_method():
+    class PartialStore(SessionStore):
+        async def create(self, jti, user_id, expires_at):
+            pass
+
+    with pytest.raises(TypeError):
+        PartialStore()
@@ -0,0 +1,55 @@
+import os
+import sys
+from sqlalchemy import create_engine, text
+
+# Add the project root directory to PYTHONPATH
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+
+from app.migrations import MIGRATIONS, missing_indexes, run_migrations, schema_migrations
+
+
+def fresh_engine(tmp_path):
+    return create_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+
+
+def test_run_migrations_applies_everything_once(tmp_path):
+    engine = fresh_engine(tmp_path)
+    assert run_migrations(engine) == [version for version, _, _ in MIGRATIONS]
+    assert run_migrations(engine) == []
+    assert missing_indexes(engine) == []
+
+
+def test_every_step_can_run_again_on_a_migrated_schema(tmp_path):
+    engine = fresh_engine(tmp_path)
+    run_migrations(engine)
+    # As if each step had failed after doing its work but before being recorded
+    with engine.begin() as conn:
+        conn.execute(schema_migrations.delete())
+    assert run_migrations(engine) == [version for version, _, _ in MIGRATIONS]
+    assert missing_indexes(engine) == []
+
+
+def test_missing_indexes_reports_dropped_index(tmp_path):
+    engine = fresh_engine(tmp_path)
+    run_migrations(engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX ix_tasks1_user_id_time_of_generation"))
+    assert missing_indexes(engine) == [("tasks1", ("user_id", "time_of_generation"))]
+
+    # Re-running the index step puts it back
+    with engine.begin() as conn:
+        conn.execute(schema_migrations.delete().where(schema_migrations.c.version == 8))
+    assert run_migrations(engine) == [8]
+    assert missing_indexes(engine) == []
+
+
+def test_each_index_step_builds_only_its_own_index(tmp_path):
+    engine = fresh_engine(tmp_path)
+    run_migrations(engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX ix_tasks1_user_id_time_of_generation"))
+        conn.execute(text("DROP INDEX ix_tasks1_status_due_date"))
+        conn.execute(schema_migrations.delete().where(schema_migrations.c.version == 9))
+    assert run_migrations(engine) == [9]
+    assert missing_indexes(engine) == [("tasks1", ("user_id", "time_of_generation"))]
@@ -0,0 +1,107 @@
+import asyncio
+import logging
+import pytest
+
+from app.database import database
+from app.models import users, tasks1
+from app.logging_config import setup_logging, shutdown_logging
+
+
+@pytest.fixture
+def username():
+    return "obsuser1"
+
+
+@pytest.mark.asyncio
+async def test_exhausted_pool_answers_503(test_client, monkeypatch):
+    monkeypatch.setattr(database, "acquire_timeout", 0.05)
+    timeouts = database.stats.timeouts
+    # Hold every connection slot, as a burst of slow queries would
+    for _ in range(database.max_size):
+        await database._slots.acquire()
+    try:
+        response = await test_client.post("/login", json={"username": "nobody", "password": "x"})
+    finally:
+        for _ in range(database.max_size):
+            database._slots.release()
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert database.stats.timeouts == timeouts + 1
+
+
+@pytest.mark.asyncio
+async def test_transaction_holds_one_slot_throughout(setup_database):
+    acquired = database.stats.acquired
+    async with database.transaction():
+        await database.fetch_one(users.select().limit(1))
+        assert database.stats.in_use == 1
+        await database.fetch_all(tasks1.select().limit(1))
+        assert database.stats.in_use == 1
+    assert database.stats.in_use == 0
+    assert database.stats.acquired == acquired + 1
+
+
+@pytest.mark.asyncio
+async def test_streams_beyond_the_cap_answer_503(test_client, get_token, monkeypatch):
+    monkeypatch.setattr(database, "acquire_timeout", 0.05)
+    monkeypatch.setattr(database, "_streams", asyncio.Semaphore(0))
+    response = await test_client.get("/tasks/?stream=true", headers={"Authorization": get_token})
+    assert response.status_code == 503
+
+    # A finished stream gives its slot back
+    monkeypatch.setattr(database, "_streams", asyncio.Semaphore(1))
+    response = await test_client.get("/tasks/?stream=true", headers={"Authorization": get_token})
+    assert response.status_code == 200
+    assert database._streams._value == 1
+
+
+@pytest.mark.asyncio
+async def test_health_db_reports_pool_stats(test_client):
+    response = await test_client.get("/health/db")
+    assert response.status_code == 200
+    stats = response.json()
+    assert stats["max_size"] == database.max_size
+    for key in ("in_use", "waiters", "timeouts", "acquire_seconds_histogram"):
+        assert key in stats
+    assert stats["replicas"] == []
+
+
+@pytest.mark.asyncio
+async def test_metrics_count_requests_by_route(test_client, get_token):
+    await test_client.get("/tasks/", headers={"Authorization": get_token})
+    response = await test_client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    lines = response.text.splitlines()
+    assert "# TYPE http_requests_total counter" in lines
+    assert any(line.startswith('http_requests_total{method="GET",route="/tasks/",status="200"}') for line in lines)
+    assert any(line.startswith("db_pool_in_use ") for line in lines)
+
+
+@pytest.mark.asyncio
+async def test_request_id_is_echoed_or_generated(test_client):
+    response = await test_client.get("/", headers={"X-Request-ID": "abc-123"})
+    assert response.headers["X-Request-ID"] == "abc-123"
+    response = await test_client.get("/")
+    assert len(response.headers["X-Request-ID"]) == 32
+
+
+@pytest.mark.asyncio
+async def test_tokens_never_reach_the_logs(test_client, get_token, caplog):
+    caplog.set_level(logging.DEBUG)
+    await test_client.get("/tasks/", headers={"Authorization": get_token})
+    await test_client.get("/tasks/", headers={"Authorization": get_token + "x"})
+    assert caplog.records
+    for record in caplog.records:
+        assert get_token not in record.getMessage()
+        assert get_token not in repr(vars(record))
+
+
+def test_shutdown_logging_restores_root_handlers():
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    setup_logging(level="WARNING")
+    assert root.handlers != handlers
+    shutdown_logging()
+    assert root.handlers == handlers
+    assert root.level == level
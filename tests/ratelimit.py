@@ -0,0 +1,119 @@
+import os
+import sys
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+from httpx import AsyncClient
+from httpx._transports.asgi import ASGITransport
+
+# Add the project root directory to PYTHONPATH
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+
+from app.database import database
+from app.models import rate_limits
+from app.ratelimit import (
+    DatabaseBackend, MemoryBackend, Policy, Rate, RateLimiter, RateLimitMiddleware, SlidingWindow, TokenBucket,
+    rate_limiter,
+)
+from app.main import create_app
+
+
+def test_token_bucket_allows_burst_then_refills():
+    bucket = TokenBucket(Rate(2, 10))
+    state, allowed, _ = bucket.hit(None, 0.0)
+    assert allowed
+    state, allowed, _ = bucket.hit(state, 0.0)
+    assert allowed
+    state, allowed, retry_after = bucket.hit(state, 1.0)
+    assert not allowed
+    assert retry_after == pytest.approx(4.0)
+    _, allowed, _ = bucket.hit(state, 5.0)
+    assert allowed
+
+
+def test_sliding_window_weights_previous_window():
+    window = SlidingWindow(Rate(4, 10))
+    state = None
+    for _ in range(4):
+        state, allowed, _ = window.hit(state, 9.0)
+        assert allowed
+    # 75% of the previous window still counts: 4 * 0.75 = 3 < 4
+    state, allowed, _ = window.hit(state, 12.5)
+    assert allowed
+    state, allowed, retry_after = window.hit(state, 12.5)
+    assert not allowed
+    assert retry_after > 0
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_evicts_least_recent_keys():
+    backend = MemoryBackend(max_keys=2)
+    bucket = TokenBucket(Rate(1, 60))
+    for key in ("a", "b", "c"):
+        await backend.hit(key, bucket, 0.0)
+    assert len(backend) == 2
+    # "a" was evicted, so it starts over with a full bucket
+    assert (await backend.hit("a", bucket, 0.0))[0]
+    assert not (await backend.hit("c", bucket, 0.0))[0]
+
+
+@pytest_asyncio.fixture
+async def setup_database(setup_database):
+    yield
+    await database.execute(rate_limits.delete())
+
+
+@pytest.mark.asyncio
+async def test_database_backend_shares_buckets(setup_database):
+    bucket = TokenBucket(Rate(2, 10))
+    first, second = DatabaseBackend(database), DatabaseBackend(database)
+    assert (await first.hit("login_ip:10.0.0.1", bucket, 100.0))[0]
+    assert (await second.hit("login_ip:10.0.0.1", bucket, 100.0))[0]
+    allowed, retry_after = await first.hit("login_ip:10.0.0.1", bucket, 101.0)
+    assert not allowed
+    assert retry_after == pytest.approx(4.0)
+    assert (await second.hit("login_ip:10.0.0.1", bucket, 106.0))[0]
+
+
+def limited_app(limiter):
+    app = FastAPI()
+    app.add_middleware(RateLimitMiddleware, limiter=limiter, enabled=True)
+    seen = []
+
+    @app.post("/login")
+    async def login(payload: dict):
+        seen.append(payload["username"])
+        return {"ok": True}
+
+    return app, seen
+
+
+@pytest.mark.asyncio
+async def test_middleware_returns_429_before_the_endpoint_runs():
+    policy = Policy("login_user", ["POST"], "/login", Rate(2, 60), key="username")
+    app, seen = limited_app(RateLimiter(MemoryBackend(), [policy]))
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        for _ in range(2):
+            response = await client.post("/login", json={"username": "John", "password": "x"})
+            assert response.status_code == 200
+        response = await client.post("/login", json={"username": "john", "password": "x"})
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) >= 1
+        # Another username has its own bucket
+        response = await client.post("/login", json={"username": "jane", "password": "x"})
+        assert response.status_code == 200
+    assert seen == ["John", "John", "jane"]
+
+
+@pytest.mark.asyncio
+async def test_apps_built_for_tests_are_never_limited(setup_database):
+    # However fast logins run, the other test modules cannot reach a 429
+    app = create_app(rate_limit=False)
+    limit = max(policy.rate.limit for policy in rate_limiter.policies)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        for _ in range(limit + 5):
+            response = await client.post("/login", json={"username": "nobody", "password": "x"})
+            assert response.status_code == 400
+    if isinstance(rate_limiter.backend, MemoryBackend):
+        assert len(rate_limiter.backend) == 0
@@ -0,0 +1,118 @@
+import os
+import sys
+import asyncio
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from httpx._transports.asgi import ASGITransport
+
+# Add the project root directory to PYTHONPATH
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+
+from app.database import PoolStats, ReadYourWritesMiddleware, ReplicaRouter
+
+
+class FakeDatabase:
+    """Stands in for a MonitoredDatabase; `fail` makes connects and queries error out."""
+
+    def __init__(self, name, connected=True):
+        self.name = name
+        self.is_connected = connected
+        self.fail = False
+        self.stats = PoolStats()
+
+    async def connect(self):
+        if self.fail:
+            raise OSError("connection refused")
+        self.is_connected = True
+
+    async def disconnect(self):
+        self.is_connected = False
+
+    async def fetch_val(self, query=None):
+        if self.fail:
+            raise OSError("connection reset")
+        return self.name
+
+
+def make_router(replicas=2, **options):
+    return ReplicaRouter(FakeDatabase("primary"), [FakeDatabase(f"r{i}") for i in range(replicas)], **options)
+
+
+@pytest.mark.asyncio
+async def test_round_robin_spreads_reads():
+    router = make_router()
+    picked = [router.for_read().name for _ in range(4)]
+    assert sorted(picked) == ["r0", "r0", "r1", "r1"]
+    assert picked[0] != picked[1]
+
+
+@pytest.mark.asyncio
+async def test_least_loaded_picks_the_idlest_replica():
+    router = make_router(strategy="least_loaded")
+    router.replicas[0].stats.in_use = 3
+    router.replicas[1].stats.waiters = 1
+    assert router.for_read() is router.replicas[1]
+
+
+@pytest.mark.asyncio
+async def test_reads_stick_to_the_primary_after_a_write():
+    router = make_router(sticky_seconds=60)
+    router.mark_write(7)
+    assert router.for_read(7) is router.primary
+    assert router.for_read(8) is not router.primary
+
+
+@pytest.mark.asyncio
+async def test_failed_replica_falls_back_to_the_primary():
+    router = make_router(replicas=1)
+    router.replicas[0].fail = True
+    assert await router.read(lambda db: db.fetch_val()) == "primary"
+    # Skipped until the retry window passes
+    assert router.for_read() is router.primary
+
+
+@pytest.mark.asyncio
+async def test_replica_down_at_startup_is_reconnected():
+    router = make_router(replicas=1, retry_seconds=0)
+    replica = router.replicas[0]
+    replica.is_connected = False
+    replica.fail = True
+    await router.connect()
+    assert router.for_read() is router.primary
+
+    replica.fail = False
+    router.for_read()
+    await asyncio.sleep(0)
+    assert replica.is_connected
+    assert router.for_read() is replica
+
+
+@pytest.mark.asyncio
+async def test_last_write_cookie_carries_across_workers():
+    # Two routers stand in for two workers sharing the same replica setup
+    writer, reader = make_router(sticky_seconds=60), make_router(sticky_seconds=60)
+
+    def worker(router):
+        app = FastAPI()
+        app.add_middleware(ReadYourWritesMiddleware, router=router)
+
+        @app.post("/write")
+        async def write():
+            router.mark_write(1)
+            return {}
+
+        @app.get("/read")
+        async def read():
+            return {"db": router.for_read().name}
+
+        return app
+
+    async with AsyncClient(transport=ASGITransport(app=worker(writer)), base_url="http://test") as client:
+        response = await client.post("/write")
+        cookie = response.cookies["last_write"]
+    async with AsyncClient(transport=ASGITransport(app=worker(reader)), base_url="http://test") as client:
+        assert (await client.get("/read")).json()["db"] != "primary"
+        client.cookies.set("last_write", cookie)
+        assert (await client.get("/read")).json()["db"] == "primary"
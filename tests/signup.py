@@ -1,38 +1,10 @@
-import os
-import sys
 import pytest
 import pytest_asyncio
-from httpx import AsyncClient
-from httpx._transports.asgi import ASGITransport
-from dotenv import load_dotenv
 
-# Add the project root directory to PYTHONPATH
-project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-sys.path.append(project_root)
-
-from app.main import app
 from app.database import database
 from app.models import users  # Import the users table model
 
 
-# Load environment variables from .env file
-load_dotenv()
-
-@pytest_asyncio.fixture
-async def setup_database():
-    # Connect to the database before each test
-    await database.connect()
-    yield
-    # Disconnect from the database after each test
-    await database.disconnect()
-
-@pytest_asyncio.fixture
-async def test_client(setup_database):
-    # Use ASGITransport to test the FastAPI app
-    transport = ASGITransport(app=app)
-    async with AsyncClient(transport=transport, base_url="http://test") as client:
-        yield client
-
 @pytest_asyncio.fixture
 async def cleanup_users():
     # Cleanup logic to remove test users after each test
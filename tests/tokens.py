@@ -0,0 +1,73 @@
+import os
+import sys
+import time
+import pytest
+from ecdsa import NIST256p, SigningKey
+from jose import JWTError, jwt
+
+# Add the project root directory to PYTHONPATH
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+
+from app.tokens import TokenEngine, TokenKey
+
+
+def claims(**extra):
+    return {"sub": "john", "exp": int(time.time()) + 60, **extra}
+
+
+def test_token_carries_kid_and_round_trips():
+    engine = TokenEngine(TokenKey("k1", "HS256", "secret-1"))
+    token = engine.encode(claims())
+    assert jwt.get_unverified_header(token)["kid"] == "k1"
+    assert engine.decode(token)["sub"] == "john"
+
+
+def test_rotated_key_still_verifies_old_tokens():
+    old = TokenKey("k1", "HS256", "secret-1")
+    token = TokenEngine(old).encode(claims())
+
+    rotated = TokenEngine(TokenKey("k2", "HS256", "secret-2"), previous=[old])
+    assert rotated.decode(token)["sub"] == "john"
+    assert jwt.get_unverified_header(rotated.encode(claims()))["kid"] == "k2"
+
+    retired = TokenEngine(TokenKey("k2", "HS256", "secret-2"))
+    with pytest.raises(JWTError):
+        retired.decode(token)
+
+
+def test_verified_tokens_skip_signature_check():
+    engine = TokenEngine(TokenKey("k1", "HS256", "secret-1"))
+    token = engine.encode(claims())
+    engine.decode(token)
+    engine.decode(token)
+    assert engine.verified.stats() == {"size": 1, "hits": 1, "misses": 1}
+
+
+def test_cached_token_rejected_once_its_key_is_dropped():
+    engine = TokenEngine(TokenKey("k2", "HS256", "secret-2"), previous=[TokenKey("k1", "HS256", "secret-1")])
+    token = TokenEngine(TokenKey("k1", "HS256", "secret-1")).encode(claims())
+    engine.decode(token)
+
+    del engine.keys["k1"]
+    with pytest.raises(JWTError):
+        engine.decode(token)
+
+
+def test_tampered_token_is_rejected():
+    engine = TokenEngine(TokenKey("k1", "HS256", "secret-1"))
+    forged = TokenEngine(TokenKey("k1", "HS256", "other-secret")).encode(claims(sub="admin"))
+    with pytest.raises(JWTError):
+        engine.decode(forged)
+
+
+def test_public_key_verifies_without_signing_key():
+    private_key = SigningKey.generate(curve=NIST256p)
+    signer = TokenEngine(TokenKey("ec1", "ES256", private_key.to_pem().decode(),
+                                  private_key.get_verifying_key().to_pem().decode()))
+    token = signer.encode(claims())
+
+    edge = TokenEngine(TokenKey("ec1", "ES256", verifying_key=private_key.get_verifying_key().to_pem().decode()))
+    assert edge.decode(token)["sub"] == "john"
+    with pytest.raises(RuntimeError):
+        edge.encode(claims())
@@ -0,0 +1,59 @@
+import pytest
+import pytest_asyncio
+
+
+@pytest_asyncio.fixture
+async def get_tokens(create_user):
+    # Two users: the owner of the task and someone else
+    return [await create_user("edituser1"), await create_user("edituser2")]
+
+
+@pytest.mark.asyncio
+async def test_update_task(test_client, get_tokens):
+    headers = {"Authorization": get_tokens[0]}
+    created = (await test_client.post("/tasks/", json={"title": "Draft", "description": "v1"}, headers=headers)).json()
+
+    response = await test_client.put(f"/tasks/{created['id']}", json={"title": "Final", "status": "completed"},
+                                     headers=headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["title"] == "Final"
+    assert body["status"] == "completed"
+    # Fields left out of the request keep their value
+    assert body["description"] == "v1"
+
+
+@pytest.mark.asyncio
+async def test_update_and_delete_missing_task(test_client, get_tokens):
+    headers = {"Authorization": get_tokens[0]}
+    response = await test_client.put("/tasks/999999", json={"title": "Nothing"}, headers=headers)
+    assert response.status_code == 404
+    response = await test_client.delete("/tasks/999999", headers=headers)
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_other_users_task_is_not_found_and_unchanged(test_client, get_tokens):
+    owner, other = ({"Authorization": token} for token in get_tokens)
+    created = (await test_client.post("/tasks/", json={"title": "Mine"}, headers=owner)).json()
+
+    response = await test_client.put(f"/tasks/{created['id']}", json={"title": "Stolen"}, headers=other)
+    assert response.status_code == 404
+    response = await test_client.delete(f"/tasks/{created['id']}", headers=other)
+    assert response.status_code == 404
+
+    response = await test_client.get(f"/tasks/{created['id']}", headers=owner)
+    assert response.status_code == 200
+    assert response.json()["title"] == "Mine"
+
+
+@pytest.mark.asyncio
+async def test_delete_task(test_client, get_tokens):
+    headers = {"Authorization": get_tokens[0]}
+    created = (await test_client.post("/tasks/", json={"title": "Short lived"}, headers=headers)).json()
+
+    response = await test_client.delete(f"/tasks/{created['id']}", headers=headers)
+    assert response.status_code == 200
+    assert response.json() == {"detail": "Task deleted"}
+    response = await test_client.get(f"/tasks/{created['id']}", headers=headers)
+    assert response.status_code == 404
@@ -0,0 +1,48 @@
+import os
+import sys
+import time
+
+# Add the project root directory to PYTHONPATH
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+
+from app.cache import TTLCache, UserCache
+
+
+def test_cache_counts_hits_and_misses():
+    cache = TTLCache(maxsize=2, ttl=60)
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert cache.stats() == {"size": 1, "hits": 1, "misses": 1}
+
+
+def test_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_cache_entry_bounded_by_expiry():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("token", {"username": "john"}, expires_at=time.time() - 1)
+    assert cache.get("token") is None
+    assert len(cache) == 0
+
+
+def test_user_cache_invalidates_every_token_of_a_user():
+    cache = UserCache(maxsize=10, ttl=60)
+    cache.set("t1", {"id": 1, "username": "john"})
+    cache.set("t2", {"id": 1, "username": "john"})
+    cache.set("t3", {"id": 2, "username": "jane"})
+
+    cache.invalidate_user("john")
+
+    assert cache.get("t1") is None
+    assert cache.get("t2") is None
+    assert cache.get("t3") == {"id": 2, "username": "jane"}